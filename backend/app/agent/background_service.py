@@ -85,7 +85,10 @@ class AgentBackgroundService:
                 self.browser_manager = BrowserManager(
                     headless=settings.playwright_headless,
                     user_data_dir=settings.playwright_session_dir,
-                    screenshot_dir=settings.playwright_screenshots_dir
+                    screenshot_dir=settings.playwright_screenshots_dir,
+                    full_page_screenshots=settings.playwright_full_page_screenshots,
+                    lightweight=settings.agent_playwright_lightweight,
+                    dev_mode=settings.playwright_dev_mode
                 )
 
                 await self.browser_manager.initialize()
@@ -278,22 +281,25 @@ class AgentBackgroundService:
                 )
                 logger.info(f"✅ Optimization complete: Will query only {len(company_ids)} companies (NO unnecessary API calls)")
 
-            # Fetch errors for each company (now optimized to only relevant companies)
-            all_errors = await self.fortex_client.get_all_errors_from_companies(company_ids)
+            # Stream errors per company (now optimized to only relevant companies)
+            # and store them as they arrive instead of collecting them all first
+            total_count = 0
+            skipped_count = 0
+            async for error_data in self.fortex_client.iter_all_errors(company_ids):
+                total_count += 1
 
-            # Filter by selected drivers (should already be filtered by company optimization, but kept as safety check)
-            if self.selected_driver_ids:
-                original_count = len(all_errors)
-                all_errors = [e for e in all_errors if e.get("driver_id") in self.selected_driver_ids]
-                if original_count != len(all_errors):
-                    logger.info(f"Filtered {original_count} errors down to {len(all_errors)} errors for {len(self.selected_driver_ids)} selected drivers")
-
-            logger.info(f"Found {len(all_errors)} total errors from {len(company_ids)} companies")
+                # Filter by selected drivers (should already be filtered by company optimization, but kept as safety check)
+                if self.selected_driver_ids and error_data.get("driver_id") not in self.selected_driver_ids:
+                    skipped_count += 1
+                    continue
 
-            # Store each error if new
-            for error_data in all_errors:
                 await self._store_error_if_new(error_data, config)
 
+            if skipped_count:
+                logger.info(f"Filtered {total_count} errors down to {total_count - skipped_count} errors for {len(self.selected_driver_ids)} selected drivers")
+
+            logger.info(f"Found {total_count - skipped_count} total errors from {len(company_ids)} companies")
+
         except Exception as e:
             logger.exception(f"Failed to poll errors: {e}")
 
@@ -337,7 +343,7 @@ class AgentBackgroundService:
                 return
 
             # Store all severity levels (LOW, MEDIUM, HIGH, CRITICAL)
-            logger.debug(f"Processing {classification.severity.value} severity error: {classification.key}")
+            logger.debug(f"Processing {classification.severity.label} severity error: {classification.key}")
 
             # Enrich with driver and company names from Supabase
             error_data = await self._enrich_with_names(error_data)
@@ -369,8 +375,8 @@ class AgentBackgroundService:
                     error_key=classification.key,
                     error_name=classification.name,
                     error_message=error_message,
-                    severity=classification.severity.value,
-                    category=classification.category.value,
+                    severity=classification.severity.label,
+                    category=classification.category.label,
                     status="pending",
                     error_metadata=error_data.get("metadata", {}),
                     discovered_at=datetime.utcnow()
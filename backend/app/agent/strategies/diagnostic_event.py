@@ -32,7 +32,12 @@ class DiagnosticEventFixStrategy(BaseFixStrategy):
     async def execute(self, error, fix, browser_manager) -> FixResult:
         start_time = time.time()
         page = browser_manager.page
-        actions = PlaywrightActions(page, browser_manager.screenshot_dir)
+        actions = PlaywrightActions(
+            page,
+            browser_manager.screenshot_dir,
+            screenshot_sink=browser_manager.queue_screenshot,
+            full_page_screenshots=browser_manager.full_page_screenshots
+        )
 
         try:
             logger.info(f"Fixing diagnostic event for driver {error.driver_id}")
@@ -42,7 +47,7 @@ class DiagnosticEventFixStrategy(BaseFixStrategy):
 
             # Navigate to diagnostics page
             diagnostics_url = f"{browser_manager.login_url.rstrip('/')}/diagnostics/{error.driver_id}"
-            await page.goto(diagnostics_url, wait_until="networkidle")
+            await page.goto(diagnostics_url, wait_until="domcontentloaded")  # next click auto-waits
 
             # Find and click acknowledge button for this event
             # Try multiple selector patterns
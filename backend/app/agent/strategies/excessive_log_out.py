@@ -29,7 +29,12 @@ class ExcessiveLogOutFixStrategy(BaseFixStrategy):
     async def execute(self, error, fix, browser_manager) -> FixResult:
         start_time = time.time()
         page = browser_manager.page
-        actions = PlaywrightActions(page, browser_manager.screenshot_dir)
+        actions = PlaywrightActions(
+            page,
+            browser_manager.screenshot_dir,
+            screenshot_sink=browser_manager.queue_screenshot,
+            full_page_screenshots=browser_manager.full_page_screenshots
+        )
 
         try:
             logger.info(f"Fixing excessive logout warning for driver {error.driver_id}")
@@ -32,7 +32,12 @@ class ManualLocationFixStrategy(BaseFixStrategy):
     async def execute(self, error, fix, browser_manager) -> FixResult:
         start_time = time.time()
         page = browser_manager.page
-        actions = PlaywrightActions(page, browser_manager.screenshot_dir)
+        actions = PlaywrightActions(
+            page,
+            browser_manager.screenshot_dir,
+            screenshot_sink=browser_manager.queue_screenshot,
+            full_page_screenshots=browser_manager.full_page_screenshots
+        )
 
         try:
             logger.info(f"Fixing manual location error for event {error.event_id}")
@@ -40,7 +45,7 @@ class ManualLocationFixStrategy(BaseFixStrategy):
             await browser_manager.ensure_logged_in()
 
             event_url = f"{browser_manager.login_url.rstrip('/')}/events/{error.event_id}/edit"
-            await page.goto(event_url, wait_until="networkidle")
+            await page.goto(event_url, wait_until="domcontentloaded")  # next click auto-waits
 
             # Try to click "Use GPS Location" button
             gps_clicked = await actions.click(
@@ -32,7 +32,12 @@ class NoShutdownErrorFixStrategy(BaseFixStrategy):
     async def execute(self, error, fix, browser_manager) -> FixResult:
         start_time = time.time()
         page = browser_manager.page
-        actions = PlaywrightActions(page, browser_manager.screenshot_dir)
+        actions = PlaywrightActions(
+            page,
+            browser_manager.screenshot_dir,
+            screenshot_sink=browser_manager.queue_screenshot,
+            full_page_screenshots=browser_manager.full_page_screenshots
+        )
 
         try:
             logger.info(f"Fixing no shutdown error for driver {error.driver_id}")
@@ -41,7 +46,7 @@ class NoShutdownErrorFixStrategy(BaseFixStrategy):
 
             # Navigate to log edit page
             log_url = f"{browser_manager.login_url.rstrip('/')}/logs/{error.log_id or error.driver_id}"
-            await page.goto(log_url, wait_until="networkidle")
+            await page.goto(log_url, wait_until="domcontentloaded")  # next click auto-waits
 
             # Click "Add Event" or "Add Shutdown" button
             add_clicked = await actions.click("button:has-text('Add Event'), button:has-text('Add Shutdown')")
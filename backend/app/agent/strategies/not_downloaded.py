@@ -32,7 +32,12 @@ class NotDownloadedFixStrategy(BaseFixStrategy):
     async def execute(self, error, fix, browser_manager) -> FixResult:
         start_time = time.time()
         page = browser_manager.page
-        actions = PlaywrightActions(page, browser_manager.screenshot_dir)
+        actions = PlaywrightActions(
+            page,
+            browser_manager.screenshot_dir,
+            screenshot_sink=browser_manager.queue_screenshot,
+            full_page_screenshots=browser_manager.full_page_screenshots
+        )
 
         try:
             logger.info(f"Fixing not downloaded error for event {error.event_id}")
@@ -41,7 +46,7 @@ class NotDownloadedFixStrategy(BaseFixStrategy):
 
             # Navigate to driver sync page
             sync_url = f"{browser_manager.login_url.rstrip('/')}/drivers/{error.driver_id}/sync"
-            await page.goto(sync_url, wait_until="networkidle")
+            await page.goto(sync_url, wait_until="domcontentloaded")  # next click auto-waits
 
             # Click "Sync Now" or "Download Events" button
             sync_clicked = await actions.click(
@@ -361,9 +361,9 @@ async def trigger_scan(
 
             # Извлекаем driver_id из каждого DriverLog
             driver_ids_to_scan = [
-                driver.driver_id or driver.driverId
+                driver.driver_id
                 for driver in smart_analyze.drivers
-                if driver.driver_id or driver.driverId
+                if driver.driver_id
             ]
 
             logger.info(f"Найдено {len(driver_ids_to_scan)} водителей в компании")
@@ -489,7 +489,7 @@ async def trigger_scan(
                         driver_name = _driver_names_map.get(driver_id)
                         if not driver_name and _company_data:
                             for driver_log in _company_data.drivers:
-                                if (driver_log.driver_id == driver_id or driver_log.driverId == driver_id):
+                                if driver_log.driver_id == driver_id:
                                     driver_name = driver_log.driver_name
                                     break
 
@@ -610,9 +610,9 @@ async def scan_logs_only(
             # Get drivers
             smart_analyze = await fortex_client.get_smart_analyze(request.company_id)
             driver_ids_to_scan = [
-                driver.driver_id or driver.driverId
+                driver.driver_id
                 for driver in smart_analyze.drivers
-                if driver.driver_id or driver.driverId
+                if driver.driver_id
             ]
 
             company_data = smart_analyze
@@ -733,7 +733,7 @@ async def scan_logs_only(
                     driver_name = _driver_names_map.get(driver_id)
                     if not driver_name and _company_data:
                         for driver_log in _company_data.drivers:
-                            if (driver_log.driver_id == driver_id or driver_log.driverId == driver_id):
+                            if driver_log.driver_id == driver_id:
                                 driver_name = driver_log.driver_name
                                 break
 
@@ -33,6 +33,11 @@ class Settings(BaseSettings):
     playwright_headless: bool = False  # Show browser during automation (user can watch)
     playwright_screenshots_dir: str = "./screenshots"
     playwright_session_dir: str = "./playwright_data"
+    playwright_full_page_screenshots: bool = False  # Viewport-only screenshots are much cheaper
+    debug_screenshots: bool = False  # Step-by-step scanner screenshots, also on with log_level=DEBUG (error screenshots are always taken)
+    playwright_lightweight: bool = True  # Log scanner: don't download images/fonts/media
+    agent_playwright_lightweight: bool = False  # Fix agent: off so fix-evidence screenshots render images/fonts
+    playwright_dev_mode: bool = False  # Relax CORS/site isolation (localhost targets only)
 
     # Database
     database_url: str
@@ -45,6 +50,8 @@ class Settings(BaseSettings):
     # Security
     secret_key: str
     access_token_expire_minutes: int = 60
+    user_cache_ttl_seconds: int = 60  # Per-process cache of authenticated users (0 disables)
+    bcrypt_rounds: int = 12  # Work factor for new password hashes (existing hashes keep theirs)
 
     # Agent Configuration
     agent_polling_interval_seconds: int = 300
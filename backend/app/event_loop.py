@@ -0,0 +1,20 @@
+"""Event loop setup shared by the backend entry points."""
+
+import asyncio
+import sys
+
+
+def install_uvloop() -> None:
+    """
+    Use uvloop's event loop policy on Linux/macOS when it is installed.
+
+    Call before asyncio.run(). Not needed under the uvicorn CLI, which
+    already picks uvloop itself (loop="auto").
+    """
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
@@ -4,8 +4,9 @@ Fortex API HTTP client with authentication and error handling.
 
 import httpx
 import asyncio
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, Iterator, List, Optional, Dict, Any, Union
 from loguru import logger
+from pydantic import TypeAdapter
 
 from .models import (
     MonitoringOverview,
@@ -16,6 +17,10 @@ from .models import (
 )
 
 
+# Smart analyze responds with either a bare list of driver logs or a wrapped object
+_SMART_ANALYZE_BODY = TypeAdapter(Union[List[DriverLog], SmartAnalyzeResponse])
+
+
 class FortexAPIClient:
     """
     Async HTTP client for Fortex API.
@@ -28,12 +33,16 @@ class FortexAPIClient:
     - Response validation using Pydantic models
     """
 
+    NESTED_ERRORS_RECHECK_EVERY = 20
+
     def __init__(
         self,
         base_url: str,
         auth_token: str,
         system_name: str = "zero",
-        timeout: int = 30
+        timeout: int = 30,
+        max_concurrent_requests: int = 8,
+        keepalive_expiry: float = 30.0
     ):
         """
         Initialize Fortex API client.
@@ -43,19 +52,43 @@ class FortexAPIClient:
             auth_token: Authorization token (y3He9C57ecfmMAsR19)
             system_name: System name for x-system-name header (default: "zero")
             timeout: Request timeout in seconds (default: 30)
+            max_concurrent_requests: Cap on parallel requests in fan-out helpers (default: 8)
+            keepalive_expiry: Seconds an idle pooled connection is kept open (default: 30)
         """
         self.base_url = base_url.rstrip("/")
         self.auth_token = auth_token
         self.system_name = system_name
         self.timeout = timeout
 
+        # Bounds concurrent requests issued by the fan-out helpers
+        self._fanout_semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+        # In-flight smart-analyze fetches keyed by company_id (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Per-company: does any driverLogs entry carry nested logCheckErrors?
+        # Companies known not to are skipped in the nested walk, with a full
+        # re-check every NESTED_ERRORS_RECHECK_EVERY calls to catch schema drift.
+        self._has_nested_errors: Dict[str, bool] = {}
+        self._nested_walk_calls: Dict[str, int] = {}
+
+        # Built once and shared by every request; Content-Type is left to
+        # httpx, which sets it for json= payloads
+        self._default_headers = httpx.Headers({
+            "Authorization": self.auth_token,
+            "x-system-name": self.system_name
+        })
+
+        # Keep as many idle connections as the fan-out can use, and keep them
+        # longer than httpx's 5 s default so calls spread over a scan batch
+        # reuse them instead of paying a new TCP+TLS handshake
         self.client = httpx.AsyncClient(
-            headers={
-                "Authorization": self.auth_token,
-                "x-system-name": self.system_name,
-                "Content-Type": "application/json"
-            },
-            timeout=httpx.Timeout(timeout)
+            headers=self._default_headers,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_keepalive_connections=max_concurrent_requests,
+                keepalive_expiry=keepalive_expiry
+            )
         )
 
     async def close(self):
@@ -70,7 +103,7 @@ class FortexAPIClient:
         **kwargs
     ) -> Dict[str, Any]:
         """
-        Make HTTP request with retry logic.
+        Make HTTP request with retry logic and decode the JSON body.
 
         Args:
             method: HTTP method (GET, POST, etc.)
@@ -80,6 +113,28 @@ class FortexAPIClient:
 
         Returns:
             JSON response as dictionary
+        """
+        response = await self._send_request(method, endpoint, max_retries, **kwargs)
+        return response.json()
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        max_retries: int = 3,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Make HTTP request with retry logic.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint (e.g., "/monitoring")
+            max_retries: Maximum number of retry attempts
+            **kwargs: Additional arguments for httpx request
+
+        Returns:
+            Successful httpx response (body not decoded)
 
         Raises:
             httpx.HTTPError: On HTTP errors after retries
@@ -103,8 +158,7 @@ class FortexAPIClient:
                 # Raise for HTTP errors (4xx, 5xx)
                 response.raise_for_status()
 
-                # Return JSON response
-                return response.json()
+                return response
 
             except httpx.TimeoutException as e:
                 logger.error(f"Timeout on attempt {attempt + 1}: {e}")
@@ -172,30 +226,59 @@ class FortexAPIClient:
 
         Returns:
             SmartAnalyzeResponse with driver logs and logCheckErrors
+
+        Concurrent callers for the same company share one HTTP request:
+        later callers await the first caller's result instead of issuing
+        a duplicate fetch. If the caller that owns the request is cancelled,
+        a waiting caller takes over and fetches again.
         """
+        while (inflight := self._inflight.get(company_id)) is not None:
+            logger.debug(f"Joining in-flight smart analyze for company {company_id}")
+            try:
+                # shield: a cancelled waiter must not cancel the shared future
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only the owner was cancelled, not us: retry (and likely own the fetch)
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[company_id] = future
+        try:
+            response = await self._fetch_smart_analyze(company_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved; waiters (if any) re-raise it themselves
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            del self._inflight[company_id]
+
+    async def _fetch_smart_analyze(self, company_id: str) -> SmartAnalyzeResponse:
+        """Fetch and parse smart analyze for one company (no coalescing)."""
         try:
             logger.info(f"Fetching smart analyze for company {company_id}")
-            data = await self._make_request("GET", f"/monitoring/smart-analyze/{company_id}")
+            raw = await self._send_request("GET", f"/monitoring/smart-analyze/{company_id}")
 
-            # Handle different response formats
-            if isinstance(data, list):
-                # Response is array of driver logs
-                drivers = [DriverLog(**log) for log in data]
-                total_errors = sum(len(d.logCheckErrors) for d in drivers)
+            # Parse and validate the body in one pass; the API returns either
+            # a bare array of driver logs or an object with a drivers array
+            data = _SMART_ANALYZE_BODY.validate_json(raw.content)
 
+            if isinstance(data, list):
                 response = SmartAnalyzeResponse(
-                    drivers=drivers,
-                    company_id=company_id,
-                    total_errors=total_errors
-                )
-            elif isinstance(data, dict):
-                # Response is object with drivers array
-                response = SmartAnalyzeResponse(
+                    drivers=data,
                     company_id=company_id,
-                    **data
+                    total_errors=sum(len(d.logCheckErrors) for d in data)
                 )
             else:
-                raise ValueError(f"Unexpected response format: {type(data)}")
+                response = data
+                response.company_id = company_id
 
             logger.info(
                 f"Retrieved {len(response.drivers)} drivers for company {company_id}, "
@@ -221,6 +304,8 @@ class FortexAPIClient:
         Returns:
             Dictionary mapping company_id to SmartAnalyzeResponse
         """
+        # Drop duplicate IDs, keeping first-seen order
+        company_ids = list(dict.fromkeys(company_ids))
         logger.info(f"Fetching smart analyze for {len(company_ids)} companies")
 
         results = {}
@@ -259,18 +344,21 @@ class FortexAPIClient:
             supabase = get_supabase_client()
             companies = await supabase.get_companies_with_drivers()
 
-            # Build driver_id to company_id mapping
-            companies_with_drivers = set()
+            # Build driver_id to company_id mapping (dict keeps order deterministic)
+            companies_with_drivers: Dict[str, None] = {}
+            matched_names = []
 
             for company in companies:
                 company_driver_ids = {driver.driver_id for driver in company.drivers}
 
                 # Check if any selected driver belongs to this company
                 if any(driver_id in company_driver_ids for driver_id in driver_ids):
-                    companies_with_drivers.add(company.company_id)
-                    logger.info(f"✓ Company {company.company_name} contains selected driver(s)")
+                    companies_with_drivers[company.company_id] = None
+                    matched_names.append(company.company_name)
 
             result = list(companies_with_drivers)
+            if matched_names:
+                logger.info(f"✓ Companies containing selected driver(s): {', '.join(matched_names)}")
             logger.info(f"✅ Found {len(result)} companies (optimized - NO unnecessary Fortex API calls)")
             return result
 
@@ -286,78 +374,144 @@ class FortexAPIClient:
         """
         Get all logCheckErrors from specified companies.
 
+        Materializes iter_all_errors(); prefer iterating that directly when
+        errors can be consumed one at a time.
+
         Args:
             company_ids: List of company UUIDs to scan
 
         Returns:
             List of error dictionaries with company and driver context
         """
-        all_errors = []
-
-        responses = await self.get_smart_analyze_for_companies(company_ids)
-
-        for company_id, response in responses.items():
-            logger.debug(f"Processing company {company_id}, {len(response.drivers)} drivers")
-
-            for driver_log in response.drivers:
-                # Check if logCheckErrors exist at driver level
-                driver_level_errors = len(driver_log.logCheckErrors)
-                logger.debug(f"Driver {driver_log.driver_id}: {driver_level_errors} errors at driver level")
-
-                # Process driver-level logCheckErrors
-                for idx, error in enumerate(driver_log.logCheckErrors):
-                    error_dict = {
-                        "company_id": company_id,
-                        "company_name": response.company_name,
-                        "driver_id": driver_log.driver_id or driver_log.driverId,
-                        "driver_name": driver_log.driver_name,
-                        "log_id": error.id,  # Use 'id' field from API
-                        "event_id": error.id,  # Same as log_id
-                        "error_message": error.errorMessage,  # Use camelCase field
-                        "error_type": error.errorType,  # Use camelCase field
-                        "timestamp": str(error.errorTime) if error.errorTime else None,
-                        "metadata": {
-                            "eventCode": error.eventCode,
-                            "errorTime": error.errorTime
-                        }
-                    }
-                    all_errors.append(error_dict)
-
-                # Also check if errors are nested inside driverLogs array
-                if driver_log.driverLogs:
-                    logger.debug(f"Driver has {len(driver_log.driverLogs)} log entries")
-                    for log_entry in driver_log.driverLogs:
-                        # Check if this log entry has logCheckErrors
-                        if isinstance(log_entry, dict) and 'logCheckErrors' in log_entry:
-                            log_errors = log_entry.get('logCheckErrors', [])
-                            logger.debug(f"Found {len(log_errors)} errors in log entry")
-
-                            for error_item in log_errors:
-                                # Extract error message from various possible fields
-                                error_message = (
-                                    error_item.get('error_message') or
-                                    error_item.get('message') or
-                                    error_item.get('errorMessage') or
-                                    str(error_item)
-                                )
-
-                                error_dict = {
-                                    "company_id": company_id,
-                                    "company_name": response.company_name,
-                                    "driver_id": driver_log.driver_id or driver_log.driverId,
-                                    "driver_name": driver_log.driver_name,
-                                    "log_id": error_item.get('log_id') or error_item.get('logId'),
-                                    "event_id": error_item.get('event_id') or error_item.get('eventId'),
-                                    "error_message": error_message,
-                                    "error_type": error_item.get('type'),
-                                    "timestamp": error_item.get('timestamp') or error_item.get('date'),
-                                    "metadata": error_item.get('metadata', {})
-                                }
-                                all_errors.append(error_dict)
+        company_ids = list(dict.fromkeys(company_ids))
+        all_errors = [error async for error in self.iter_all_errors(company_ids)]
 
         logger.info(f"Collected {len(all_errors)} errors from {len(company_ids)} companies")
         return all_errors
 
+    async def iter_all_errors(
+        self,
+        company_ids: List[str]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream logCheckErrors from specified companies.
+
+        Companies are fetched concurrently and errors are yielded as soon as
+        each company's response arrives, so callers can persist or broadcast
+        them without holding the full result set in memory. Companies that
+        fail to fetch are logged and skipped.
+
+        Args:
+            company_ids: List of company UUIDs to scan
+
+        Yields:
+            Error dictionaries with company and driver context
+        """
+        # Drop duplicate IDs, keeping first-seen order
+        company_ids = list(dict.fromkeys(company_ids))
+
+        async def fetch(company_id: str):
+            try:
+                async with self._fanout_semaphore:
+                    return company_id, await self.get_smart_analyze(company_id)
+            except Exception as e:
+                logger.error(f"Failed to fetch company {company_id}: {e}")
+                return company_id, None
+
+        tasks = [asyncio.create_task(fetch(company_id)) for company_id in company_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                company_id, response = await next_done
+                if response is None:
+                    continue
+                for error in self._iter_company_errors(company_id, response):
+                    yield error
+        finally:
+            # Consumer may stop early; don't leave fetches running
+            for task in tasks:
+                task.cancel()
+            # Wait for the cancellations to land so none is left pending
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _iter_company_errors(
+        self,
+        company_id: str,
+        response: SmartAnalyzeResponse
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield error dicts for one company's smart analyze response."""
+        # Debug lines below use loguru's deferred formatting so the message
+        # is only built when a DEBUG sink is actually listening
+        company_name = response.company_name
+        logger.debug("Processing company {}, {} drivers", company_id, len(response.drivers))
+
+        calls = self._nested_walk_calls.get(company_id, 0) + 1
+        self._nested_walk_calls[company_id] = calls
+        walk_nested = (
+            self._has_nested_errors.get(company_id, True)
+            or calls % self.NESTED_ERRORS_RECHECK_EVERY == 0
+        )
+        found_nested = False
+
+        for driver_log in response.drivers:
+            driver_id = driver_log.driver_id
+            driver_name = driver_log.driver_name
+            log_check_errors = driver_log.logCheckErrors
+            logger.debug("Driver {}: {} errors at driver level", driver_id, len(log_check_errors))
+
+            # Process driver-level logCheckErrors
+            for error in log_check_errors:
+                error_time = error.errorTime
+                yield {
+                    "company_id": company_id,
+                    "company_name": company_name,
+                    "driver_id": driver_id,
+                    "driver_name": driver_name,
+                    "log_id": error.id,  # Use 'id' field from API
+                    "event_id": error.id,  # Same as log_id
+                    "error_message": error.errorMessage,  # Use camelCase field
+                    "error_type": error.errorType,  # Use camelCase field
+                    "timestamp": str(error_time) if error_time else None,
+                    "metadata": {
+                        "eventCode": error.eventCode,
+                        "errorTime": error_time
+                    }
+                }
+
+            # Also check if errors are nested inside driverLogs array
+            if walk_nested and driver_log.driverLogs:
+                logger.debug("Driver has {} log entries", len(driver_log.driverLogs))
+                for log_entry in driver_log.driverLogs:
+                    # Check if this log entry has logCheckErrors
+                    if isinstance(log_entry, dict) and 'logCheckErrors' in log_entry:
+                        found_nested = True
+                        log_errors = log_entry.get('logCheckErrors', [])
+                        logger.debug("Found {} errors in log entry", len(log_errors))
+
+                        for error_item in log_errors:
+                            # Extract error message from various possible fields
+                            error_message = (
+                                error_item.get('error_message') or
+                                error_item.get('message') or
+                                error_item.get('errorMessage') or
+                                str(error_item)
+                            )
+
+                            yield {
+                                "company_id": company_id,
+                                "company_name": company_name,
+                                "driver_id": driver_id,
+                                "driver_name": driver_name,
+                                "log_id": error_item.get('log_id') or error_item.get('logId'),
+                                "event_id": error_item.get('event_id') or error_item.get('eventId'),
+                                "error_message": error_message,
+                                "error_type": error_item.get('type'),
+                                "timestamp": error_item.get('timestamp') or error_item.get('date'),
+                                "metadata": error_item.get('metadata', {})
+                            }
+
+        if walk_nested:
+            self._has_nested_errors[company_id] = found_nested
+
     async def smart_analyze_driver(
         self,
         driver_id: str,
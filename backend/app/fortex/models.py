@@ -3,32 +3,34 @@ Pydantic models for Fortex API responses.
 """
 
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field, field_validator
 from datetime import datetime
 
 
 class LogCheckError(BaseModel):
-    """Individual error from logCheckErrors array"""
+    """
+    Individual error from logCheckErrors array.
+
+    Kept deliberately narrow: consumers only read these fields, so anything
+    else in the payload is dropped instead of being stored as extras.
+    """
     id: Optional[str] = None
     eventCode: Optional[str] = Field(None, alias="eventCode")
     errorTime: Optional[int] = Field(None, alias="errorTime")
-    errorMessage: str = Field(None, alias="errorMessage")  # Main error message field
+    # Main error message field; legacy payloads send it as error_message/message
+    errorMessage: Optional[str] = Field(
+        None,
+        validation_alias=AliasChoices("errorMessage", "error_message", "message")
+    )
     errorType: Optional[str] = Field(None, alias="errorType")
 
     # Legacy/alternative field names (for compatibility)
     type: Optional[str] = None
-    message: Optional[str] = None
     timestamp: Optional[str] = None
-    error_message: Optional[str] = None
-    driver_id: Optional[str] = None
-    driver_name: Optional[str] = None
-    log_id: Optional[str] = None
-    event_id: Optional[str] = None
-    date: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
 
     class Config:
-        extra = "allow"  # Allow additional fields from API
+        extra = "ignore"  # Skip fields nobody reads
+        frozen = True
         populate_by_name = True  # Allow both camelCase and snake_case
 
 
@@ -44,8 +46,10 @@ class DriverState(BaseModel):
 class DriverLog(BaseModel):
     """Driver log entry with errors from smart-analyze endpoint"""
     timezone: Optional[str] = None
-    driverId: str = Field(alias="driverId")
-    driver_id: Optional[str] = None  # Normalized field
+    driver_id: str = Field(
+        validation_alias=AliasChoices("driverId", "driver_id"),
+        serialization_alias="driverId"
+    )
     driver_name: Optional[str] = None
     company_id: Optional[str] = None
     company_name: Optional[str] = None
@@ -58,17 +62,13 @@ class DriverLog(BaseModel):
         extra = "allow"
         populate_by_name = True
 
-    def __init__(self, **data):
+    @field_validator("driverLogs", mode="before")
+    @classmethod
+    def _wrap_single_driver_log(cls, value):
         # Fix driverLogs if it's a dict instead of list
-        if 'driverLogs' in data and isinstance(data['driverLogs'], dict):
-            # Convert dict to list with single element
-            data['driverLogs'] = [data['driverLogs']]
-
-        super().__init__(**data)
-
-        # Normalize driverId to driver_id
-        if hasattr(self, 'driverId') and not self.driver_id:
-            self.driver_id = self.driverId
+        if isinstance(value, dict):
+            return [value]
+        return value
 
 
 class SmartAnalyzeResponse(BaseModel):
@@ -3,11 +3,35 @@ Generic UI interaction wrappers with error handling and retry logic.
 """
 
 import asyncio
-from typing import Optional, Tuple, List
+import random
+from typing import Awaitable, Callable, Dict, Optional, Tuple, List
 from pathlib import Path
-from playwright.async_api import Page, TimeoutError as PlaywrightTimeout
+from playwright.async_api import (
+    ElementHandle,
+    Error as PlaywrightError,
+    Page,
+    TimeoutError as PlaywrightTimeout
+)
 from loguru import logger
 
+from .screenshots import screenshot_filename, write_screenshot
+
+
+# Bulk DOM readers for get_texts/get_counts: one evaluate call for N selectors
+_GET_TEXTS_JS = """
+sels => sels.map(s => {
+    const e = document.querySelector(s);
+    return e ? (e.textContent || "").trim() || null : null;
+})
+"""
+
+_GET_COUNTS_JS = "sels => sels.map(s => document.querySelectorAll(s).length)"
+
+
+def _backoff(attempt: int, base: float = 0.25, cap: float = 2.0) -> float:
+    """Full-jitter exponential backoff delay in seconds, capped at `cap`."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
 
 class PlaywrightActions:
     """
@@ -20,10 +44,19 @@ class PlaywrightActions:
     - Success/error message detection
     """
 
+    # Default timeouts (ms). Actions fail fast and rely on retries; only
+    # navigation gets a long budget. Applied per call rather than via
+    # page.set_default_timeout, since the page is shared with other code.
+    ACTION_TIMEOUT_MS = 1500
+    VERIFY_TIMEOUT_MS = 3000
+    NAV_TIMEOUT_MS = 15000
+
     def __init__(
         self,
         page: Page,
-        screenshot_dir: str = "./screenshots"
+        screenshot_dir: str = "./screenshots",
+        screenshot_sink: Optional[Callable[[Path, bytes], Awaitable[None]]] = None,
+        full_page_screenshots: bool = False
     ):
         """
         Initialize Playwright Actions.
@@ -31,19 +64,27 @@ class PlaywrightActions:
         Args:
             page: Playwright Page object
             screenshot_dir: Directory to save screenshots
+            screenshot_sink: Async callable that persists (path, png_bytes),
+                e.g. BrowserManager.queue_screenshot; written inline if omitted
+            full_page_screenshots: Capture the whole scrollable page instead of the viewport
         """
         self.page = page
-        self.screenshot_dir = Path(screenshot_dir)
-        self.screenshot_dir.mkdir(parents=True, exist_ok=True)
+        self.screenshot_sink = screenshot_sink
+        self.full_page_screenshots = full_page_screenshots
+        self.screenshot_dir = Path(screenshot_dir)  # Created on first screenshot
 
     async def wait_for_selector(
         self,
         selector: str,
-        timeout: int = 5000,
+        timeout: int = ACTION_TIMEOUT_MS,
         state: str = "visible"
     ) -> bool:
         """
-        Wait for element to appear.
+        Wait for element to reach a state.
+
+        Not needed before click/fill/select_option/get_text, which wait for
+        the element themselves; use it when the state itself matters
+        (e.g. "hidden"/"detached" after closing a dialog).
 
         Args:
             selector: CSS selector
@@ -67,15 +108,53 @@ class PlaywrightActions:
             logger.error(f"Error waiting for selector {selector}: {e}")
             return False
 
+    async def wait_for_element(
+        self,
+        selector: str,
+        timeout: int = ACTION_TIMEOUT_MS,
+        state: str = "visible",
+        log_timeout: bool = True
+    ) -> Optional[ElementHandle]:
+        """
+        Wait for element to appear and return its handle.
+
+        Lets callers read from the element without a second lookup.
+
+        Args:
+            selector: CSS selector
+            timeout: Wait timeout in milliseconds
+            state: Element state to wait for (visible or attached)
+            log_timeout: Log a warning when the wait times out
+
+        Returns:
+            ElementHandle if element found, None otherwise
+        """
+        try:
+            return await self.page.wait_for_selector(
+                selector,
+                timeout=timeout,
+                state=state
+            )
+        except PlaywrightTimeout:
+            if log_timeout:
+                logger.warning(f"Timeout waiting for selector: {selector}")
+            return None
+        except Exception as e:
+            logger.error(f"Error waiting for selector {selector}: {e}")
+            return None
+
     async def click(
         self,
         selector: str,
-        timeout: int = 5000,
+        timeout: int = ACTION_TIMEOUT_MS,
         max_retries: int = 3
     ) -> bool:
         """
         Click element with retry and error capture.
 
+        Uses a locator, so waiting for the element to become visible,
+        stable and enabled happens inside the click itself.
+
         Args:
             selector: CSS selector
             timeout: Click timeout in milliseconds
@@ -84,40 +163,33 @@ class PlaywrightActions:
         Returns:
             True if click successful, False otherwise
         """
+        last_error = None
         for attempt in range(max_retries):
             try:
-                # Wait for element to be visible
-                if not await self.wait_for_selector(selector, timeout):
-                    await self.capture_screenshot(f"click_wait_failed_{selector.replace(' ', '_')}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1)
-                        continue
-                    return False
-
-                # Click element
-                await self.page.click(selector, timeout=timeout)
+                await self.page.locator(selector).first.click(timeout=timeout)
                 logger.debug(f"Clicked: {selector}")
                 return True
 
-            except PlaywrightTimeout:
-                logger.warning(f"Click timeout on {selector} (attempt {attempt + 1}/{max_retries})")
-                await self.capture_screenshot(f"click_timeout_{selector.replace(' ', '_')}")
-
-            except Exception as e:
-                logger.error(f"Click failed on {selector}: {e}")
-                await self.capture_screenshot(f"click_error_{selector.replace(' ', '_')}")
+            except PlaywrightError as e:
+                # Timeouts and transient errors (element detached, execution
+                # context destroyed by a re-render) are all worth another attempt
+                last_error = e
+                logger.debug(f"Click failed on {selector} (attempt {attempt + 1}/{max_retries}): {e}")
 
             # Wait before retry
             if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                await asyncio.sleep(_backoff(attempt))
 
+        # Log and screenshot once, after the final attempt, not on every retry
+        logger.warning(f"Click failed on {selector} after {max_retries} attempts: {last_error}")
+        await self.capture_screenshot(f"click_error_{selector}")
         return False
 
     async def fill(
         self,
         selector: str,
         value: str,
-        timeout: int = 5000,
+        timeout: int = ACTION_TIMEOUT_MS,
         max_retries: int = 3
     ) -> bool:
         """
@@ -132,27 +204,23 @@ class PlaywrightActions:
         Returns:
             True if fill successful, False otherwise
         """
+        last_error = None
         for attempt in range(max_retries):
             try:
-                # Wait for element
-                if not await self.wait_for_selector(selector, timeout):
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1)
-                        continue
-                    return False
-
-                # Clear and fill
-                await self.page.fill(selector, value, timeout=timeout)
+                # Clear and fill (locator waits for an editable element)
+                await self.page.locator(selector).first.fill(value, timeout=timeout)
                 logger.debug(f"Filled {selector} with: {value}")
                 return True
 
-            except Exception as e:
-                logger.error(f"Fill failed on {selector}: {e}")
-                await self.capture_screenshot(f"fill_error_{selector.replace(' ', '_')}")
+            except PlaywrightError as e:
+                last_error = e
+                logger.debug(f"Fill failed on {selector} (attempt {attempt + 1}/{max_retries}): {e}")
 
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
+            if attempt < max_retries - 1:
+                await asyncio.sleep(_backoff(attempt))
 
+        logger.warning(f"Fill failed on {selector} after {max_retries} attempts: {last_error}")
+        await self.capture_screenshot(f"fill_error_{selector}")
         return False
 
     async def select_option(
@@ -160,7 +228,7 @@ class PlaywrightActions:
         selector: str,
         value: str = None,
         label: str = None,
-        timeout: int = 5000
+        timeout: int = ACTION_TIMEOUT_MS
     ) -> bool:
         """
         Select dropdown option.
@@ -174,32 +242,31 @@ class PlaywrightActions:
         Returns:
             True if selection successful, False otherwise
         """
+        if not value and not label:
+            logger.error("Must provide either value or label for select_option")
+            return False
+
         try:
-            # Wait for element
-            if not await self.wait_for_selector(selector, timeout):
-                return False
+            locator = self.page.locator(selector).first
 
             # Select by value or label
             if value:
-                await self.page.select_option(selector, value=value, timeout=timeout)
-            elif label:
-                await self.page.select_option(selector, label=label, timeout=timeout)
+                await locator.select_option(value=value, timeout=timeout)
             else:
-                logger.error("Must provide either value or label for select_option")
-                return False
+                await locator.select_option(label=label, timeout=timeout)
 
             logger.debug(f"Selected option in {selector}")
             return True
 
         except Exception as e:
             logger.error(f"Select option failed on {selector}: {e}")
-            await self.capture_screenshot(f"select_error_{selector.replace(' ', '_')}")
+            await self.capture_screenshot(f"select_error_{selector}")
             return False
 
     async def get_text(
         self,
         selector: str,
-        timeout: int = 5000
+        timeout: int = ACTION_TIMEOUT_MS
     ) -> Optional[str]:
         """
         Get text content from element.
@@ -212,21 +279,58 @@ class PlaywrightActions:
             Element text content or None if failed
         """
         try:
-            if not await self.wait_for_selector(selector, timeout):
-                return None
-
-            text = await self.page.text_content(selector, timeout=timeout)
+            text = await self.page.locator(selector).first.text_content(timeout=timeout)
             return text.strip() if text else None
 
+        except PlaywrightTimeout:
+            logger.warning(f"Timeout waiting for selector: {selector}")
+            return None
+
         except Exception as e:
             logger.error(f"Get text failed on {selector}: {e}")
             return None
 
+    async def get_texts(self, selectors: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Get text content of several elements in one browser round trip.
+
+        Unlike get_text, doesn't wait: elements must already be on the page.
+
+        Args:
+            selectors: CSS selectors
+
+        Returns:
+            Mapping of selector to stripped text (None if not found)
+        """
+        try:
+            values = await self.page.evaluate(_GET_TEXTS_JS, selectors)
+            return dict(zip(selectors, values))
+        except PlaywrightError as e:
+            logger.error(f"Bulk get text failed: {e}")
+            return {selector: None for selector in selectors}
+
+    async def get_counts(self, selectors: List[str]) -> Dict[str, int]:
+        """
+        Count elements for several selectors in one browser round trip.
+
+        Args:
+            selectors: CSS selectors
+
+        Returns:
+            Mapping of selector to number of matching elements
+        """
+        try:
+            values = await self.page.evaluate(_GET_COUNTS_JS, selectors)
+            return dict(zip(selectors, values))
+        except PlaywrightError as e:
+            logger.error(f"Bulk count failed: {e}")
+            return {selector: 0 for selector in selectors}
+
     async def verify_success(
         self,
         success_selector: str = None,
         error_selector: str = None,
-        timeout: int = 10000
+        timeout: int = VERIFY_TIMEOUT_MS
     ) -> Tuple[bool, str]:
         """
         Verify action success by checking for success/error messages.
@@ -250,25 +354,40 @@ class PlaywrightActions:
             if not selectors:
                 return True, "No verification selectors provided"
 
-            # Wait for any of the selectors
+            # Race the selectors; whichever becomes visible first wins
+            waiters = {
+                asyncio.create_task(
+                    self.wait_for_element(selector, timeout=timeout, log_timeout=False)
+                ): selector
+                for selector in selectors
+            }
             found_selector = None
-            for selector in selectors:
-                if await self.wait_for_selector(selector, timeout=timeout // len(selectors)):
-                    found_selector = selector
-                    break
+            handle = None
+            pending = set(waiters)
+            try:
+                while pending and not found_selector:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        handle = task.result()
+                        if handle:
+                            found_selector = waiters[task]
+                            break
+            finally:
+                for task in pending:
+                    task.cancel()
 
             if not found_selector:
                 logger.warning("No success/error message found")
                 return False, "No confirmation message appeared"
 
-            # Get message text
-            message_text = await self.get_text(found_selector)
+            # Get message text from the element we already hold
+            message_text = ((await handle.text_content()) or "").strip()
 
             # Determine success/failure
             is_success = found_selector == success_selector
             logger.info(f"Verification result: {'Success' if is_success else 'Error'} - {message_text}")
 
-            return is_success, message_text or ""
+            return is_success, message_text
 
         except Exception as e:
             logger.error(f"Verification failed: {e}")
@@ -277,7 +396,8 @@ class PlaywrightActions:
     async def wait_for_navigation(
         self,
         url_pattern: str = None,
-        timeout: int = 30000
+        timeout: int = NAV_TIMEOUT_MS,
+        wait_for_network_idle: bool = False
     ) -> bool:
         """
         Wait for page navigation.
@@ -285,6 +405,9 @@ class PlaywrightActions:
         Args:
             url_pattern: URL pattern to wait for (glob pattern)
             timeout: Wait timeout in milliseconds
+            wait_for_network_idle: Wait for "networkidle" instead of
+                "domcontentloaded" when no pattern is given. Pages with
+                websockets or polling may never reach it.
 
         Returns:
             True if navigation successful, False otherwise
@@ -293,7 +416,8 @@ class PlaywrightActions:
             if url_pattern:
                 await self.page.wait_for_url(url_pattern, timeout=timeout)
             else:
-                await self.page.wait_for_load_state("networkidle", timeout=timeout)
+                state = "networkidle" if wait_for_network_idle else "domcontentloaded"
+                await self.page.wait_for_load_state(state, timeout=timeout)
 
             logger.debug(f"Navigation complete, current URL: {self.page.url}")
             return True
@@ -315,15 +439,15 @@ class PlaywrightActions:
         Returns:
             Path to saved screenshot or None if failed
         """
-        from datetime import datetime
-
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{name}_{timestamp}.png"
-            filepath = self.screenshot_dir / filename
+            filepath = self.screenshot_dir / screenshot_filename(name)
 
-            await self.page.screenshot(path=str(filepath), full_page=True)
-            logger.info(f"Screenshot saved: {filepath}")
+            data = await self.page.screenshot(full_page=self.full_page_screenshots)
+            if self.screenshot_sink:
+                await self.screenshot_sink(filepath, data)
+            else:
+                await write_screenshot(filepath, data)
+                logger.info(f"Screenshot saved: {filepath}")
             return filepath
 
         except Exception as e:
@@ -342,7 +466,7 @@ class PlaywrightActions:
         """
         try:
             return await self.page.is_visible(selector)
-        except:
+        except PlaywrightError:
             return False
 
     async def count_elements(self, selector: str) -> int:
@@ -358,5 +482,5 @@ class PlaywrightActions:
         try:
             elements = await self.page.query_selector_all(selector)
             return len(elements)
-        except:
+        except PlaywrightError:
             return 0
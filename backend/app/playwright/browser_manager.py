@@ -3,9 +3,11 @@ Browser lifecycle management with session persistence.
 """
 
 import os
+import json
+import time
 import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 from playwright.async_api import (
     async_playwright,
     Browser,
@@ -15,6 +17,8 @@ from playwright.async_api import (
 )
 from loguru import logger
 
+from .screenshots import screenshot_filename, write_screenshot
+
 
 class SessionExpiredError(Exception):
     """Raised when browser session has expired and needs re-authentication."""
@@ -33,11 +37,55 @@ class BrowserManager:
     - Screenshot capture on errors
     """
 
+    SCREENSHOT_QUEUE_SIZE = 32
+
+    # Chromium flags used on every launch: quiet UI, hidden automation
+    CORE_ARGS = (
+        "--disable-notifications",  # Disable browser notifications
+        "--disable-extensions",
+        "--disable-popup-blocking",  # Allow popups from our automation
+        "--disable-infobars",  # Disable infobars
+        "--disable-blink-features=AutomationControlled",  # Hide automation
+        "--no-first-run",  # Skip first run wizards (also covers default apps/sync prompts)
+        "--no-default-browser-check",
+        "--no-service-autorun",  # Don't autorun services
+        "--password-store=basic",  # Use basic password store
+        "--use-mock-keychain",  # Use mock keychain (no OS prompts)
+    )
+
+    # Security relaxations for local development only (CORS, isolation)
+    DEV_ARGS = (
+        "--disable-web-security",  # Disable CORS (for localhost)
+        "--disable-features=IsolateOrigins,site-per-process",  # Disable origin isolation
+        "--allow-running-insecure-content",  # Allow localhost
+        "--disable-site-isolation-trials",  # Disable site isolation
+    )
+
+    # Parsed session_state.json shared by every manager in the process, so
+    # re-initializing doesn't re-read and re-parse the file
+    _cached_state: Optional[Dict[str, Any]] = None
+
+    # Resource types aborted in lightweight mode. Stylesheets stay: layout
+    # drives visibility/actionability checks (e.g. Ant Design dropdowns).
+    BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+    # Shared by the main context and isolated contexts
+    CONTEXT_OPTIONS = {
+        "viewport": {"width": 1920, "height": 1080},
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "accept_downloads": True,  # Allow downloads without prompts
+        "bypass_csp": True,  # Bypass Content Security Policy
+        "ignore_https_errors": True,  # Ignore HTTPS errors for localhost
+    }
+
     def __init__(
         self,
         headless: bool = True,
         user_data_dir: str = "./playwright_data",
-        screenshot_dir: str = "./screenshots"
+        screenshot_dir: str = "./screenshots",
+        full_page_screenshots: bool = False,
+        lightweight: bool = False,
+        dev_mode: bool = False
     ):
         """
         Initialize Browser Manager.
@@ -46,15 +94,22 @@ class BrowserManager:
             headless: Run browser in headless mode
             user_data_dir: Directory to store session data
             screenshot_dir: Directory to save screenshots
+            full_page_screenshots: Capture the whole scrollable page instead of the viewport
+            lightweight: Abort image/font/media requests for every page in the context
+            dev_mode: Also pass DEV_ARGS (disable CORS/site isolation) to Chromium
         """
         self.headless = headless
+        self.full_page_screenshots = full_page_screenshots
+        self.lightweight = lightweight
+        self.dev_mode = dev_mode
+        self.launch_args = list(self.CORE_ARGS + (self.DEV_ARGS if dev_mode else ()))
         self.user_data_dir = Path(user_data_dir)
         self.screenshot_dir = Path(screenshot_dir)
         self.session_file = self.user_data_dir / "session_state.json"
 
-        # Create directories
+        # The session file lives in user_data_dir; the screenshot directory
+        # is created on first write
         self.user_data_dir.mkdir(parents=True, exist_ok=True)
-        self.screenshot_dir.mkdir(parents=True, exist_ok=True)
 
         # Playwright objects
         self.playwright: Optional[Playwright] = None
@@ -62,6 +117,11 @@ class BrowserManager:
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
 
+        # Screenshots are written to disk by a background worker so capture
+        # doesn't wait on file I/O (started in initialize)
+        self._screenshot_queue: Optional[asyncio.Queue] = None
+        self._screenshot_task: Optional[asyncio.Task] = None
+
         # Login credentials (set via login method)
         self.login_url: Optional[str] = None
         self.username: Optional[str] = None
@@ -75,44 +135,34 @@ class BrowserManager:
         try:
             logger.info(f"Initializing Playwright (headless={self.headless})")
 
+            self._screenshot_queue = asyncio.Queue(maxsize=self.SCREENSHOT_QUEUE_SIZE)
+            self._screenshot_task = asyncio.create_task(self._screenshot_worker())
+
             self.playwright = await async_playwright().start()
+            launch_started = time.perf_counter()
             self.browser = await self.playwright.chromium.launch(
                 headless=self.headless,
-                args=[
-                    "--disable-notifications",  # Disable browser notifications
-                    "--disable-default-apps",
-                    "--disable-extensions",
-                    "--disable-sync",
-                    "--no-default-browser-check",
-                    "--disable-popup-blocking",  # Allow popups from our automation
-                    "--disable-infobars",  # Disable infobars
-                    "--disable-blink-features=AutomationControlled",  # Hide automation
-                    "--disable-web-security",  # Disable CORS (for localhost)
-                    "--disable-features=IsolateOrigins,site-per-process",  # Disable origin isolation
-                    "--allow-running-insecure-content",  # Allow localhost
-                    "--disable-site-isolation-trials",  # Disable site isolation
-                    "--no-first-run",  # Skip first run wizards
-                    "--no-service-autorun",  # Don't autorun services
-                    "--password-store=basic",  # Use basic password store
-                    "--use-mock-keychain",  # Use mock keychain (no OS prompts)
-                ]
+                args=self.launch_args,
+            )
+            logger.info(
+                f"Browser launched in {time.perf_counter() - launch_started:.2f}s "
+                f"({len(self.launch_args)} args, dev_mode={self.dev_mode})"
             )
 
-            # Load persistent context (preserves cookies/session)
-            context_options = {
-                "viewport": {"width": 1920, "height": 1080},
-                "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "accept_downloads": True,  # Allow downloads without prompts
-                "bypass_csp": True,  # Bypass Content Security Policy
-                "ignore_https_errors": True,  # Ignore HTTPS errors for localhost
-            }
-
-            if self.session_file.exists():
+            # Load saved session (preserves cookies/localStorage)
+            context_options = dict(self.CONTEXT_OPTIONS)
+            if BrowserManager._cached_state is None and self.session_file.exists():
                 logger.info("Loading existing session state")
-                context_options["storage_state"] = str(self.session_file)
+                BrowserManager._cached_state = json.loads(self.session_file.read_text())
+
+            if BrowserManager._cached_state is not None:
+                context_options["storage_state"] = BrowserManager._cached_state
 
             self.context = await self.browser.new_context(**context_options)
 
+            if self.lightweight:
+                await self.context.route("**/*", self._block_heavy_resources)
+
             self.page = await self.context.new_page()
 
             logger.info("Playwright initialized successfully")
@@ -122,6 +172,33 @@ class BrowserManager:
             await self.cleanup()
             raise
 
+    async def new_isolated_context(self) -> BrowserContext:
+        """
+        Create a separate context pre-authenticated with this profile's session.
+
+        Contexts don't share DOM, localStorage or in-app state, so parallel
+        workflows can't race each other the way tabs of one context do. The
+        caller closes the returned context.
+
+        Returns:
+            New BrowserContext seeded with the current cookies/localStorage
+        """
+        storage_state = await self.context.storage_state()
+        context = await self.browser.new_context(
+            storage_state=storage_state,
+            **self.CONTEXT_OPTIONS,
+        )
+        if self.lightweight:
+            await context.route("**/*", self._block_heavy_resources)
+        return context
+
+    async def _block_heavy_resources(self, route) -> None:
+        """Route handler: abort heavy static resources, pass everything else."""
+        if route.request.resource_type in self.BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
     async def login(
         self,
         url: str,
@@ -155,12 +232,15 @@ class BrowserManager:
             self.username = username
             self.password = password
 
-            # Navigate to login page
-            await self.page.goto(url, wait_until="networkidle")
+            # Navigate to login page (the fills below auto-wait for the form;
+            # networkidle never settles with background polling)
+            await self.page.goto(url, wait_until="domcontentloaded")
 
-            # Fill credentials
-            await self.page.fill(username_selector, username)
-            await self.page.fill(password_selector, password)
+            # Fill credentials (independent fields, filled concurrently)
+            await asyncio.gather(
+                self.page.fill(username_selector, username),
+                self.page.fill(password_selector, password),
+            )
 
             # Click submit
             await self.page.click(submit_selector)
@@ -168,8 +248,7 @@ class BrowserManager:
             # Wait for redirect to dashboard
             await self.page.wait_for_url(success_url_pattern, timeout=15000)
 
-            # Save session cookies
-            await self.context.storage_state(path=str(self.session_file))
+            await self.save_session()
 
             logger.info("Login successful, session saved")
             return True
@@ -179,6 +258,23 @@ class BrowserManager:
             await self.capture_screenshot("login_failed")
             return False
 
+    async def save_session(self) -> None:
+        """
+        Save the context's cookies/localStorage for future initializations.
+
+        The parsed state is cached for this process; the JSON file is written
+        atomically so a concurrently starting manager never reads it half-written.
+        """
+        state = await self.context.storage_state()
+        BrowserManager._cached_state = state
+        await asyncio.to_thread(self._write_session_file, json.dumps(state))
+
+    def _write_session_file(self, content: str) -> None:
+        """Write session_state.json via a temp file and rename."""
+        tmp_path = self.session_file.with_suffix(f".{os.getpid()}.{id(self)}.tmp")
+        tmp_path.write_text(content)
+        os.replace(tmp_path, self.session_file)
+
     async def is_logged_in(self, dashboard_url: str = None) -> bool:
         """
         Check if session is still valid.
@@ -233,26 +329,72 @@ class BrowserManager:
         """
         Save screenshot with timestamp.
 
+        The image is captured immediately; writing it to disk is handed to
+        the background screenshot worker.
+
         Args:
             name: Base name for screenshot file
 
         Returns:
-            Path to saved screenshot
+            Path the screenshot is (or will shortly be) saved to
         """
-        from datetime import datetime
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{name}_{timestamp}.png"
-        filepath = self.screenshot_dir / filename
+        filepath = self.screenshot_dir / screenshot_filename(name)
 
         try:
-            await self.page.screenshot(path=str(filepath), full_page=True)
-            logger.info(f"Screenshot saved: {filepath}")
+            data = await self.page.screenshot(full_page=self.full_page_screenshots)
+            await self.queue_screenshot(filepath, data)
             return filepath
         except Exception as e:
             logger.error(f"Failed to capture screenshot: {e}")
             return None
 
+    async def queue_screenshot(self, filepath: Path, data: bytes) -> None:
+        """
+        Hand captured screenshot bytes to the background writer.
+
+        Falls back to writing in a worker thread when the writer isn't
+        running; drops the screenshot if the queue is full.
+
+        Args:
+            filepath: Destination file
+            data: PNG bytes
+        """
+        if self._screenshot_queue is None:
+            await write_screenshot(filepath, data)
+            logger.info(f"Screenshot saved: {filepath}")
+            return
+
+        try:
+            self._screenshot_queue.put_nowait((filepath, data))
+        except asyncio.QueueFull:
+            logger.warning(f"Screenshot queue full, dropping: {filepath}")
+
+    async def _screenshot_worker(self) -> None:
+        """Write queued screenshots to disk one at a time."""
+        while True:
+            filepath, data = await self._screenshot_queue.get()
+            try:
+                await write_screenshot(filepath, data)
+                logger.info(f"Screenshot saved: {filepath}")
+            except Exception as e:
+                logger.error(f"Failed to write screenshot {filepath}: {e}")
+            finally:
+                self._screenshot_queue.task_done()
+
+    async def _stop_screenshot_worker(self) -> None:
+        """Flush pending screenshots and stop the writer."""
+        if self._screenshot_task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._screenshot_queue.join(), timeout=10)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out flushing pending screenshots")
+
+        self._screenshot_task.cancel()
+        self._screenshot_task = None
+        self._screenshot_queue = None
+
     async def cleanup(self) -> None:
         """Close browser and cleanup resources."""
         try:
@@ -267,6 +409,8 @@ class BrowserManager:
             if self.playwright:
                 await self.playwright.stop()
 
+            await self._stop_screenshot_worker()
+
             logger.info("Playwright cleanup complete")
 
         except Exception as e:
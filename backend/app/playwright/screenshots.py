@@ -0,0 +1,49 @@
+"""
+Screenshot file naming shared by BrowserManager and PlaywrightActions.
+"""
+
+import asyncio
+import itertools
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Set
+
+# Anything outside this set (spaces, CSS punctuation like / [ ] : #) becomes "_"
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# Disambiguates screenshots taken within the same microsecond
+_sequence = itertools.count()
+
+# Directories already created, so mkdir runs once per directory, on first use
+_ready_dirs: Set[Path] = set()
+
+
+def safe_name(name: str, max_length: int = 80) -> str:
+    """Make an arbitrary string (e.g. a CSS selector) safe for a filename."""
+    return _UNSAFE_CHARS.sub("_", name)[:max_length]
+
+
+def screenshot_filename(name: str) -> str:
+    """Build a unique, filesystem-safe screenshot filename for `name`."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return f"{safe_name(name)}_{timestamp}_{next(_sequence)}.png"
+
+
+def write_screenshot_file(filepath: Path, data: bytes) -> None:
+    """Write PNG bytes to disk, creating the directory on first use (blocking)."""
+    directory = filepath.parent
+    if directory not in _ready_dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+        _ready_dirs.add(directory)
+    filepath.write_bytes(data)
+
+
+async def write_screenshot(filepath: Path, data: bytes) -> None:
+    """
+    Write PNG bytes without blocking the event loop.
+
+    Single entry point for screenshot writes, so the I/O backend can change
+    without touching call sites.
+    """
+    await asyncio.to_thread(write_screenshot_file, filepath, data)
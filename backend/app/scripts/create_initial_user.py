@@ -3,33 +3,46 @@
 import asyncio
 import sys
 from loguru import logger
+from sqlalchemy.exc import DBAPIError
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(__file__).rsplit("\\", 2)[0])
 
 from app.database.session import get_db_session, init_db
+from app.event_loop import install_uvloop
 from app.services.auth_service import create_user, get_user_by_username
 
 
+async def _find_existing_user(username: str):
+    """Look up a user in its own session; None if the table doesn't exist yet."""
+    try:
+        async with get_db_session() as db:
+            return await get_user_by_username(db, username)
+    except DBAPIError:
+        return None
+
+
 async def create_initial_user():
     """Create the initial admin user."""
-    # First, ensure database tables are created
-    logger.info("Initializing database tables...")
-    await init_db()
-    logger.success("✓ Database tables ready")
-
     username = "admin"
     email = "admin@zeroeld.com"
     password = "admin123"
     full_name = "Administrator"
 
-    async with get_db_session() as db:
-        # Check if admin user already exists
-        existing_user = await get_user_by_username(db, username)
-        if existing_user:
-            logger.info(f"Admin user '{username}' already exists")
-            return existing_user
+    # Ensure database tables are created while checking for an existing admin;
+    # on an initialized database both finish in one round of I/O
+    logger.info("Initializing database tables...")
+    _, existing_user = await asyncio.gather(
+        init_db(),
+        _find_existing_user(username),
+    )
+    logger.success("✓ Database tables ready")
 
+    if existing_user:
+        logger.info(f"Admin user '{username}' already exists")
+        return existing_user
+
+    async with get_db_session() as db:
         # Create admin user
         user = await create_user(
             db,
@@ -53,6 +66,7 @@ async def create_initial_user():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     logger.info("Creating initial admin user...")
     user = asyncio.run(create_initial_user())
     if user:
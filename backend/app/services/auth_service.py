@@ -1,39 +1,79 @@
 """Authentication service for user management and JWT token handling."""
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
-import uuid
+from typing import Dict, Optional, Tuple
+import base64
+import hmac
+import json
+import re
+import time
 
-import bcrypt
-from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from loguru import logger
 
 from app.config import get_settings
 from app.database.models import User
+from app.services.password_hasher import hash_password, verify_password
 
 settings = get_settings()
 
+# Successfully decoded tokens -> claims. Every authenticated request decodes
+# the same bearer token, so the HMAC check runs once per token; expiry is
+# still re-checked on every hit.
+TOKEN_CACHE_SIZE = 4096
+_token_cache: "OrderedDict[str, dict]" = OrderedDict()
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    # Convert password to bytes and hash it
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+# User id -> (expires_at, detached snapshot). Saves the users lookup that
+# follows every token decode; write paths below invalidate their entry.
+_user_cache: Dict[str, Tuple[float, User]] = {}
 
+_UUID_RE = re.compile(
+    r"\A[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\Z"
+)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against its hash."""
-    try:
-        password_bytes = plain_password.encode('utf-8')
-        hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
-    except Exception as e:
-        logger.error(f"Password verification error: {e}")
-        return False
+
+class TokenError(ValueError):
+    """Raised when an access token is malformed, forged or expired."""
+
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+# Only HS256 tokens are issued, so the header segment is a constant. Tokens
+# signed by the previous JWT libraries used this exact (key-sorted) header.
+_JWT_HEADER = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+_SECRET_KEY = settings.secret_key.encode("utf-8")
+
+
+def _sign(signing_input: bytes) -> bytes:
+    return _b64url_encode(hmac.digest(_SECRET_KEY, signing_input, "sha256"))
+
+
+def _decode_hs256(token: str) -> dict:
+    """Verify an HS256 token issued by create_access_token and return its claims."""
+    signing_input, _, signature = token.encode("ascii").rpartition(b".")
+    header, _, body = signing_input.partition(b".")
+    if header != _JWT_HEADER:
+        raise TokenError("Unsupported token header")
+    if not hmac.compare_digest(signature, _sign(signing_input)):
+        raise TokenError("Signature verification failed")
+
+    claims = json.loads(_b64url_decode(body))
+    if not isinstance(claims, dict):
+        raise TokenError("Token payload is not an object")
+    exp = claims.get("exp")
+    if exp is not None and (not isinstance(exp, (int, float)) or exp <= time.time()):
+        raise TokenError("Signature has expired")
+    return claims
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -49,13 +89,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        lifetime = int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        lifetime = settings.access_token_expire_minutes * 60
 
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
-    return encoded_jwt
+    to_encode["exp"] = int(time.time()) + lifetime
+    payload = _b64url_encode(json.dumps(to_encode, separators=(",", ":")).encode("utf-8"))
+    signing_input = _JWT_HEADER + b"." + payload
+    return (signing_input + b"." + _sign(signing_input)).decode("ascii")
 
 
 def decode_token(token: str) -> Optional[dict]:
@@ -68,13 +109,24 @@ def decode_token(token: str) -> Optional[dict]:
     Returns:
         Dictionary of claims if valid, None otherwise
     """
+    payload = _token_cache.get(token)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            _token_cache.move_to_end(token)
+            return payload
+        del _token_cache[token]
+
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
-        return payload
-    except JWTError as e:
+        payload = _decode_hs256(token)
+    except ValueError as e:
         logger.debug(f"Invalid token: {e}")
         return None
 
+    _token_cache[token] = payload
+    if len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+    return payload
+
 
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """
@@ -91,7 +143,7 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> O
     user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password(password, user.password_hash):
         return None
     return user
 
@@ -107,13 +159,36 @@ async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
     Returns:
         User object or None
     """
-    try:
-        user_uuid = uuid.UUID(user_id)
-    except (ValueError, TypeError):
+    if not isinstance(user_id, str) or not _UUID_RE.match(user_id):
         return None
 
-    result = await db.execute(select(User).where(User.id == user_uuid))
-    return result.scalars().first()
+    cache_key = user_id.lower()
+    cached = _user_cache.get(cache_key)
+    if cached is not None:
+        expires_at, snapshot = cached
+        if expires_at > time.monotonic():
+            # Copy the snapshot into this session without a SELECT
+            return await db.merge(snapshot, load=False)
+        del _user_cache[cache_key]
+
+    # asyncpg encodes the canonical string form of a uuid directly
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if user is not None and settings.user_cache_ttl_seconds > 0:
+        _user_cache[cache_key] = (time.monotonic() + settings.user_cache_ttl_seconds, _snapshot_user(user))
+    return user
+
+
+def _snapshot_user(user: User) -> User:
+    """Detached column-only copy of a user, safe to share between sessions."""
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def invalidate_user_cache(user: User) -> None:
+    """Drop a user's cached row after it changes."""
+    _user_cache.pop(str(user.id), None)
 
 
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
@@ -168,14 +243,18 @@ async def create_user(
     Returns:
         Created User object or None if creation failed
     """
-    # Check if user already exists
-    existing_user = await get_user_by_username(db, username)
-    if existing_user:
+    # Check username and email in one round-trip (the session can't run two
+    # lookups concurrently, so gathering separate queries wouldn't overlap)
+    result = await db.execute(
+        select(User.username, User.email).where(
+            or_(User.username == username, User.email == email)
+        )
+    )
+    existing = result.all()
+    if any(row.username == username for row in existing):
         logger.warning(f"Username '{username}' already exists")
         return None
-
-    existing_email = await get_user_by_email(db, email)
-    if existing_email:
+    if existing:
         logger.warning(f"Email '{email}' already exists")
         return None
 
@@ -183,7 +262,7 @@ async def create_user(
     user = User(
         username=username,
         email=email,
-        password_hash=hash_password(password),
+        password_hash=await hash_password(password),
         full_name=full_name,
         is_superuser=is_superuser,
         is_active=True,
@@ -209,11 +288,17 @@ async def update_user_last_login(db: AsyncSession, user: User) -> None:
         db: Database session
         user: User object to update
     """
-    user.last_login_at = datetime.utcnow()
-    db.add(user)
+    now = datetime.utcnow()
     try:
+        # Single-column core UPDATE; skips the unit-of-work flush
+        await db.execute(
+            update(User).where(User.id == user.id).values(last_login_at=now, updated_at=now)
+        )
         await db.commit()
-        await db.refresh(user)
+        # Only after commit: a concurrent read before it would re-cache the old row
+        invalidate_user_cache(user)
+        set_committed_value(user, "last_login_at", now)
+        set_committed_value(user, "updated_at", now)
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to update last login for {user.username}: {e}")
@@ -231,10 +316,9 @@ async def deactivate_user(db: AsyncSession, user: User) -> bool:
         True if successful, False otherwise
     """
     user.is_active = False
-    db.add(user)
     try:
         await db.commit()
-        await db.refresh(user)
+        invalidate_user_cache(user)
         logger.info(f"User deactivated: {user.username}")
         return True
     except Exception as e:
@@ -255,11 +339,10 @@ async def change_password(db: AsyncSession, user: User, new_password: str) -> bo
     Returns:
         True if successful, False otherwise
     """
-    user.password_hash = hash_password(new_password)
-    db.add(user)
+    user.password_hash = await hash_password(new_password)
     try:
         await db.commit()
-        await db.refresh(user)
+        invalidate_user_cache(user)
         logger.info(f"Password changed for user: {user.username}")
         return True
     except Exception as e:
@@ -4,35 +4,59 @@ This module contains the ERROR_FILTERS converted from zeroVios.js.
 Updated with fix strategies based on Fortex AI REPAIR capabilities.
 """
 
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Optional, Callable, List
-from enum import Enum
+from functools import lru_cache
+from typing import Dict, Optional, List
+from enum import Enum, IntEnum
 
 
-class ErrorCategory(str, Enum):
+class _LabeledEnum(IntEnum):
+    """Int-valued enum that serializes as its lower-case name.
+
+    Members compare as plain ints internally; use ``label`` (or ``str()``)
+    wherever the value crosses into the database, logs or Telegram output.
+    """
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+    def __str__(self) -> str:
+        return self.label
+
+
+class ErrorCategory(_LabeledEnum):
     """Error categories for grouping error types."""
-    DATA_INTEGRITY = "data_integrity"
-    LOCATION_MOVEMENT = "location_movement"
-    STATUS_EVENT = "status_event"
-    DIAGNOSTIC = "diagnostic"
-    SPEED = "speed"
-    AUTHENTICATION = "authentication"
+    DATA_INTEGRITY = 1
+    LOCATION_MOVEMENT = 2
+    STATUS_EVENT = 3
+    DIAGNOSTIC = 4
+    SPEED = 5
+    AUTHENTICATION = 6
 
 
-class ErrorSeverity(str, Enum):
-    """Error severity levels."""
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
+class ErrorSeverity(_LabeledEnum):
+    """Error severity levels (ordered, LOW < CRITICAL)."""
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
 
 
-class FixStrategy(str, Enum):
+class FixStrategy(_LabeledEnum):
     """How the error should be handled/fixed."""
-    OBSOLETE = "obsolete"       # Error type no longer exists in Fortex
-    INFO_ONLY = "info_only"     # Show as error but don't attempt to fix
-    AI_REPAIR = "ai_repair"     # Can be fixed via Fortex AI REPAIR button
-    CUSTOM = "custom"           # Requires custom fix logic from PTHORA AI
+    OBSOLETE = 1       # Error type no longer exists in Fortex
+    INFO_ONLY = 2      # Show as error but don't attempt to fix
+    AI_REPAIR = 3      # Can be fixed via Fortex AI REPAIR button
+    CUSTOM = 4         # Requires custom fix logic from PTHORA AI
+
+
+class MatchKind(str, Enum):
+    """How a filter's name is compared against a normalized message."""
+    EXACT = "exact"
+    PREFIX = "prefix"
+    CONTAINS = "contains"
 
 
 # Error keys hidden from Telegram output (still tracked internally)
@@ -41,15 +65,27 @@ HIDDEN_FROM_DISPLAY = {
 }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ErrorFilter:
-    """Represents an error filter for classification."""
+    """Represents an error filter for classification.
+
+    ``name`` is the upper-case message text the filter matches; messages are
+    stripped and upper-cased once before being compared against it.
+    """
     name: str
     key: str
-    match: Callable[[str], bool]
     category: ErrorCategory
     severity: ErrorSeverity
     fix_strategy: FixStrategy = FixStrategy.CUSTOM  # Default to custom
+    match_kind: MatchKind = MatchKind.EXACT
+
+    def matches(self, normalized: str) -> bool:
+        """Check a stripped, upper-cased message against this filter."""
+        if self.match_kind is MatchKind.PREFIX:
+            return normalized.startswith(self.name)
+        if self.match_kind is MatchKind.CONTAINS:
+            return self.name in normalized
+        return normalized == self.name
 
 
 # Error filter definitions (converted from zeroVios.js)
@@ -61,7 +97,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="SEQUENTIAL ID BREAK WARNING",
         key="sequentialIdBreak",
-        match=lambda msg: msg and msg.strip().upper() == "SEQUENTIAL ID BREAK WARNING",
         category=ErrorCategory.DATA_INTEGRITY,
         severity=ErrorSeverity.CRITICAL,
         fix_strategy=FixStrategy.INFO_ONLY
@@ -69,7 +104,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="ENGINE HOURS HAVE CHANGED AFTER SHUT DOWN WARNING",
         key="engineHoursAfterShutdown",
-        match=lambda msg: msg and msg.strip().upper() == "ENGINE HOURS HAVE CHANGED AFTER SHUT DOWN WARNING",
         category=ErrorCategory.DATA_INTEGRITY,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.INFO_ONLY
@@ -77,7 +111,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="EVENT IS NOT DOWNLOADED",
         key="eventIsNotDownloaded",
-        match=lambda msg: msg and msg.strip().upper() == "EVENT IS NOT DOWNLOADED",
         category=ErrorCategory.AUTHENTICATION,
         severity=ErrorSeverity.LOW,
         fix_strategy=FixStrategy.INFO_ONLY
@@ -89,7 +122,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="NO POWER UP ERROR",
         key="noPowerUpError",
-        match=lambda msg: msg and msg.strip().upper() == "NO POWER UP ERROR",
         category=ErrorCategory.DIAGNOSTIC,
         severity=ErrorSeverity.LOW,
         fix_strategy=FixStrategy.AI_REPAIR
@@ -97,7 +129,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="TWO IDENTICAL STATUSES ERROR",
         key="twoIdenticalStatusesError",
-        match=lambda msg: msg and msg.strip().upper() == "TWO IDENTICAL STATUSES ERROR",
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.AI_REPAIR
@@ -105,7 +136,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="DRIVING ORIGIN WARNING",
         key="drivingOriginWarning",
-        match=lambda msg: msg and msg.strip().upper() == "DRIVING ORIGIN WARNING",
         category=ErrorCategory.LOCATION_MOVEMENT,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.AI_REPAIR
@@ -113,7 +143,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="MISSING INTERMEDIATE ERROR",
         key="missingIntermediateError",
-        match=lambda msg: msg and msg.strip().upper() == "MISSING INTERMEDIATE ERROR",
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.AI_REPAIR
@@ -121,7 +150,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="NO SHUT DOWN ERROR",
         key="noShutdownError",
-        match=lambda msg: msg and msg.strip().upper() == "NO SHUT DOWN ERROR",
         category=ErrorCategory.DIAGNOSTIC,
         severity=ErrorSeverity.LOW,
         fix_strategy=FixStrategy.AI_REPAIR
@@ -133,7 +161,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="ODOMETER ERROR",
         key="odometerError",
-        match=lambda msg: msg and msg.strip().upper() == "ODOMETER ERROR",
         category=ErrorCategory.DATA_INTEGRITY,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.CUSTOM
@@ -141,7 +168,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="LOCATION CHANGED ERROR",
         key="locationChangedError",
-        match=lambda msg: msg and msg.strip().upper() == "LOCATION CHANGED ERROR",
         category=ErrorCategory.LOCATION_MOVEMENT,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.CUSTOM
@@ -149,7 +175,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="INCORRECT INTERMEDIATE PLACEMENT ERROR",
         key="incorrectIntermediatePlacementError",
-        match=lambda msg: msg and msg.strip().upper() == "INCORRECT INTERMEDIATE PLACEMENT ERROR",
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.CUSTOM
@@ -157,7 +182,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="ENGINE HOURS WARNING",
         key="engineHoursWarning",
-        match=lambda msg: msg and msg.strip().upper() == "ENGINE HOURS WARNING",
         category=ErrorCategory.DATA_INTEGRITY,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.CUSTOM
@@ -165,7 +189,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="EXCESSIVE LOG IN WARNING",
         key="excessiveLogInWarning",
-        match=lambda msg: msg and msg.strip().upper() == "EXCESSIVE LOG IN WARNING",
         category=ErrorCategory.AUTHENTICATION,
         severity=ErrorSeverity.LOW,
         fix_strategy=FixStrategy.CUSTOM
@@ -173,7 +196,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="EXCESSIVE LOG OUT WARNING",
         key="excessiveLogOutWarning",
-        match=lambda msg: msg and msg.strip().upper() == "EXCESSIVE LOG OUT WARNING",
         category=ErrorCategory.AUTHENTICATION,
         severity=ErrorSeverity.LOW,
         fix_strategy=FixStrategy.CUSTOM
@@ -181,7 +203,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="NO DATA IN ODOMETER OR ENGINE HOURS ERROR",
         key="noDataInOdometerOrEngineHours",
-        match=lambda msg: msg and msg.strip().upper() == "NO DATA IN ODOMETER OR ENGINE HOURS ERROR",
         category=ErrorCategory.DATA_INTEGRITY,
         severity=ErrorSeverity.CRITICAL,
         fix_strategy=FixStrategy.CUSTOM
@@ -189,7 +210,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="LOCATION ERROR",
         key="locationError",
-        match=lambda msg: msg and msg.strip().upper() == "LOCATION ERROR",
         category=ErrorCategory.LOCATION_MOVEMENT,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.CUSTOM
@@ -197,7 +217,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="LOCATION DID NOT CHANGE WARNING",
         key="locationDidNotChangeWarning",
-        match=lambda msg: msg and msg.strip().upper() == "LOCATION DID NOT CHANGE WARNING",
         category=ErrorCategory.LOCATION_MOVEMENT,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.CUSTOM
@@ -205,7 +224,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="INCORRECT STATUS PLACEMENT ERROR",
         key="incorrectStatusPlacementError",
-        match=lambda msg: msg and msg.strip().upper() == "INCORRECT STATUS PLACEMENT ERROR",
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.CUSTOM
@@ -214,7 +232,7 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="THE SPEED WAS MUCH HIGHER THAN THE SPEED LIMIT IN",
         key="speedMuchHigherThanLimit",
-        match=lambda msg: msg and msg.strip().upper().startswith("THE SPEED WAS MUCH HIGHER THAN THE SPEED LIMIT IN"),
+        match_kind=MatchKind.PREFIX,
         category=ErrorCategory.SPEED,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.CUSTOM
@@ -222,7 +240,7 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="THE SPEED WAS HIGHER THAN THE SPEED",
         key="speedHigherThanLimit",
-        match=lambda msg: msg and msg.strip().upper().startswith("THE SPEED WAS HIGHER THAN THE SPEED"),
+        match_kind=MatchKind.PREFIX,
         category=ErrorCategory.SPEED,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.CUSTOM
@@ -234,7 +252,7 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="14 HOURS VIOLATION",
         key="hosViolation14Hour",
-        match=lambda msg: msg and "14 HOURS VIOLATION" in msg.strip().upper(),
+        match_kind=MatchKind.CONTAINS,
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.INFO_ONLY
@@ -242,7 +260,7 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="11 HOURS VIOLATION",
         key="hosViolation11Hour",
-        match=lambda msg: msg and "11 HOURS VIOLATION" in msg.strip().upper(),
+        match_kind=MatchKind.CONTAINS,
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.INFO_ONLY
@@ -250,7 +268,7 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="8 HOURS VIOLATION",
         key="hosViolation8Hour",
-        match=lambda msg: msg and "8 HOURS VIOLATION" in msg.strip().upper(),
+        match_kind=MatchKind.CONTAINS,
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.HIGH,
         fix_strategy=FixStrategy.INFO_ONLY
@@ -258,7 +276,7 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="70 HOURS VIOLATION",
         key="hosViolation70Hour",
-        match=lambda msg: msg and "70 HOURS VIOLATION" in msg.strip().upper(),
+        match_kind=MatchKind.CONTAINS,
         category=ErrorCategory.STATUS_EVENT,
         severity=ErrorSeverity.CRITICAL,
         fix_strategy=FixStrategy.INFO_ONLY
@@ -270,7 +288,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="DIAGNOSTIC EVENT",
         key="diagnosticEvent",
-        match=lambda msg: msg and msg.strip().upper() == "DIAGNOSTIC EVENT",
         category=ErrorCategory.DIAGNOSTIC,
         severity=ErrorSeverity.LOW,
         fix_strategy=FixStrategy.OBSOLETE
@@ -278,7 +295,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="EVENT HAS MANUAL LOCATION",
         key="eventHasManualLocation",
-        match=lambda msg: msg and msg.strip().upper() == "EVENT HAS MANUAL LOCATION",
         category=ErrorCategory.AUTHENTICATION,
         severity=ErrorSeverity.LOW,
         fix_strategy=FixStrategy.OBSOLETE
@@ -286,7 +302,6 @@ ERROR_FILTERS: List[ErrorFilter] = [
     ErrorFilter(
         name="UNIDENTIFIED DRIVER EVENT",
         key="unidentifiedDriverEvent",
-        match=lambda msg: msg and msg.strip().upper() == "UNIDENTIFIED DRIVER EVENT",
         category=ErrorCategory.AUTHENTICATION,
         severity=ErrorSeverity.MEDIUM,
         fix_strategy=FixStrategy.OBSOLETE
@@ -294,7 +309,7 @@ ERROR_FILTERS: List[ErrorFilter] = [
 ]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ErrorClassification:
     """Result of error classification."""
     key: str
@@ -307,11 +322,39 @@ class ErrorClassification:
 class ErrorClassifier:
     """Classifies error messages using ERROR_FILTERS."""
 
+    CLASSIFY_CACHE_SIZE = 256
+
     def __init__(self):
         self.filters = ERROR_FILTERS
         # Exclude obsolete filters from active classification
         self.active_filters = [f for f in self.filters if f.fix_strategy != FixStrategy.OBSOLETE]
 
+        # Exact filters resolve with one dict lookup; only the few prefix /
+        # substring rules are scanned, in declaration order.
+        self._exact: Dict[str, ErrorFilter] = {}
+        self._scanned: List[ErrorFilter] = []
+        for filter_def in self.active_filters:
+            if filter_def.match_kind is MatchKind.EXACT:
+                self._exact.setdefault(filter_def.name, filter_def)
+            else:
+                self._scanned.append(filter_def)
+
+        # Scans repeat the same few messages thousands of times; results are
+        # immutable, so memoize per normalized message
+        self._classify_normalized = lru_cache(maxsize=self.CLASSIFY_CACHE_SIZE)(self._classify_normalized)
+
+        # Lookup indexes for the get_* accessors, built in one pass
+        self._by_key: Dict[str, ErrorFilter] = {}
+        self._by_category: Dict[ErrorCategory, List[ErrorFilter]] = defaultdict(list)
+        self._by_severity: Dict[ErrorSeverity, List[ErrorFilter]] = defaultdict(list)
+        self._by_fix_strategy: Dict[FixStrategy, List[ErrorFilter]] = defaultdict(list)
+        for filter_def in self.filters:
+            self._by_key.setdefault(filter_def.key, filter_def)
+            self._by_fix_strategy[filter_def.fix_strategy].append(filter_def)
+            if filter_def.fix_strategy != FixStrategy.OBSOLETE:
+                self._by_category[filter_def.category].append(filter_def)
+                self._by_severity[filter_def.severity].append(filter_def)
+
     def classify(self, error_message: Optional[str]) -> Optional[ErrorClassification]:
         """
         Classify an error message.
@@ -324,26 +367,49 @@ class ErrorClassifier:
         """
         if not error_message:
             return None
+        return self._classify_normalized(error_message.strip().upper())
 
-        # Only use active (non-obsolete) filters
-        for filter_def in self.active_filters:
-            if filter_def.match(error_message):
-                return ErrorClassification(
-                    key=filter_def.key,
-                    name=filter_def.name,
-                    category=filter_def.category,
-                    severity=filter_def.severity,
-                    fix_strategy=filter_def.fix_strategy
-                )
+    def classify_batch(self, error_messages: List[Optional[str]]) -> List[Optional[ErrorClassification]]:
+        """
+        Classify many error messages at once.
+
+        Log scans repeat the same handful of messages many times, so each
+        distinct normalized message is classified once and the result reused.
 
-        return None
+        Args:
+            error_messages: The error messages to classify
+
+        Returns:
+            One ErrorClassification (or None) per input message, in order
+        """
+        results: Dict[str, Optional[ErrorClassification]] = {}
+        batch: List[Optional[ErrorClassification]] = []
+        for message in error_messages:
+            normalized = message.strip().upper() if message else ""
+            if normalized not in results:
+                results[normalized] = self._classify_normalized(normalized) if normalized else None
+            batch.append(results[normalized])
+        return batch
+
+    def _classify_normalized(self, normalized: str) -> Optional[ErrorClassification]:
+        """Classify a message that is already stripped and upper-cased."""
+        filter_def = self._exact.get(normalized)
+        if filter_def is None:
+            filter_def = next((f for f in self._scanned if f.matches(normalized)), None)
+            if filter_def is None:
+                return None
+
+        return ErrorClassification(
+            key=filter_def.key,
+            name=filter_def.name,
+            category=filter_def.category,
+            severity=filter_def.severity,
+            fix_strategy=filter_def.fix_strategy
+        )
 
     def get_filter_by_key(self, key: str) -> Optional[ErrorFilter]:
         """Get error filter by key."""
-        for filter_def in self.filters:
-            if filter_def.key == key:
-                return filter_def
-        return None
+        return self._by_key.get(key)
 
     def get_all_error_keys(self) -> List[str]:
         """Get list of all active error keys (excluding obsolete)."""
@@ -351,15 +417,15 @@ class ErrorClassifier:
 
     def get_errors_by_category(self, category: ErrorCategory) -> List[ErrorFilter]:
         """Get all active error filters for a specific category."""
-        return [f for f in self.active_filters if f.category == category]
+        return list(self._by_category.get(category, ()))
 
     def get_errors_by_severity(self, severity: ErrorSeverity) -> List[ErrorFilter]:
         """Get all active error filters for a specific severity level."""
-        return [f for f in self.active_filters if f.severity == severity]
+        return list(self._by_severity.get(severity, ()))
 
     def get_errors_by_fix_strategy(self, strategy: FixStrategy) -> List[ErrorFilter]:
         """Get all error filters for a specific fix strategy."""
-        return [f for f in self.filters if f.fix_strategy == strategy]
+        return list(self._by_fix_strategy.get(strategy, ()))
 
     def get_ai_repair_errors(self) -> List[ErrorFilter]:
         """Get all errors that can be fixed via AI REPAIR button."""
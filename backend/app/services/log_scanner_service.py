@@ -1,13 +1,20 @@
 """Служба сканирования логов через Playwright (из test_demo_agent.py)."""
 
 import asyncio
-import json
+import os
 import platform
+import random
+import re
 import sys
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import orjson
 from loguru import logger
+from playwright.async_api import BrowserContext, Page, TimeoutError as PlaywrightTimeout
+from sqlalchemy import insert
 
 # Fix Playwright subprocess issue on Windows with Python 3.13+
 # Must be set BEFORE importing playwright-related modules
@@ -26,15 +33,253 @@ from app.config import get_settings
 from app.services.progress_tracker import progress_tracker
 from app.database.session import get_db_session
 from app.database.models import Error
+from app.fortex.client import FortexAPIClient
+from app.fortex.models import DriverLog, LogCheckError
 
 settings = get_settings()
 
+# date_picker живёт в backend/helpers (вне пакета app): путь и импорт - один раз при загрузке модуля
+_HELPERS_DIR = Path(__file__).resolve().parent.parent.parent / "helpers"
+if str(_HELPERS_DIR) not in sys.path:
+    sys.path.insert(0, str(_HELPERS_DIR))
+try:
+    from date_picker import set_date_range_simple
+except ImportError as e:
+    logger.warning(f"⚠️ helpers/date_picker недоступен, даты будут по умолчанию: {e}")
+    set_date_range_simple = None
+
+# Ключевые слова проблем в логах: одна скомпилированная альтернатива на поле
+# вместо lower() + проверки каждого слова по отдельности
+_STATUS_ERROR_RE = re.compile(r'error|missing|violation|invalid', re.IGNORECASE)
+_NOTES_ERROR_RE = re.compile(r'error|fail|violation|missing', re.IGNORECASE)
+
+# XHR/fetch с логами, который запускает кнопка LOAD: отдельный сегмент пути
+# /logs (не /changelogs, /driver-logs/... или login/logout)
+_LOGS_RESPONSE_RE = re.compile(r'/logs(?:/|$)', re.IGNORECASE)
+
+# Регистрируется через add_init_script до запуска скриптов страницы
+_BLOCK_FORM_SUBMIT_JS = "document.addEventListener('submit', (e) => e.preventDefault(), true);"
+
+# Хелперы выбора в Ant Design Select: разбираются браузером один раз на документ
+# (add_init_script), дальше page.evaluate шлёт только короткий вызов window.__pthora.*
+_PAGE_HELPERS_JS = """
+window.__pthora = {
+    // Помечает .ant-select-selector вокруг input и возвращает CSS-селектор для клика
+    markSelector(inputSelector, tag) {
+        const el = document.querySelector(inputSelector)
+            ?.closest('.ant-select')?.querySelector('.ant-select-selector');
+        if (!el) return null;
+        el.setAttribute('data-pthora-click', tag);
+        return `[data-pthora-click="${tag}"]`;
+    },
+    // Выбранное значение Select с input inputSelector
+    selection(inputSelector) {
+        const input = document.querySelector(inputSelector);
+        if (!input) return { value: '', error: 'input not found' };
+        const parent = input.closest('.ant-select');
+        if (!parent) return { value: '', error: 'ant-select parent not found' };
+        const selection = parent.querySelector('.ant-select-selection-item');
+        return {
+            value: selection?.textContent?.trim() || '',
+            hasSelection: !!selection,
+            inputValue: input.value || '',
+            classList: parent.className
+        };
+    },
+    // Опции открытого dropdown (первые limit текстов, с началом HTML при withHtml).
+    // С query ищет первую опцию, похожую на запрос, и помечает её для клика:
+    // match = { idx, text, selector } или null
+    dropdownOptions(limit, withHtml, query) {
+        const dropdown = document.querySelector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)');
+        if (!dropdown) return { found: false, count: 0, html: 'NO DROPDOWN' };
+        const options = Array.from(dropdown.querySelectorAll('.ant-select-item-option'));
+        let match = null;
+        if (query) {
+            document.querySelectorAll('[data-pthora-option]').forEach(o => o.removeAttribute('data-pthora-option'));
+            const q = query.trim().toLowerCase();
+            const idx = options.findIndex(o => {
+                const norm = (o.textContent || '').toLowerCase().replace(/ {1,2}eld/g, '').trim();
+                return norm !== '' && (norm.includes(q) || q.includes(norm));
+            });
+            if (idx >= 0) {
+                options[idx].setAttribute('data-pthora-option', 'match');
+                match = { idx, text: options[idx].textContent?.trim(), selector: '[data-pthora-option="match"]' };
+            }
+        }
+        return {
+            found: true,
+            count: options.length,
+            texts: options.slice(0, limit).map(o => o.textContent?.trim()),
+            match,
+            ...(withHtml ? { html: dropdown.innerHTML.substring(0, 500) } : {})
+        };
+    },
+    // Promise: true, как только откроется dropdown, false по таймауту. MutationObserver
+    // срабатывает прямо на снятии ant-select-dropdown-hidden, без опроса
+    awaitDropdown(timeout) {
+        const isOpen = () => !!document.querySelector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)');
+        if (isOpen()) return Promise.resolve(true);
+        return new Promise(resolve => {
+            const done = (ok) => { obs.disconnect(); clearTimeout(timer); resolve(ok); };
+            const obs = new MutationObserver(() => { if (isOpen()) done(true); });
+            obs.observe(document.body, { subtree: true, childList: true, attributes: true, attributeFilter: ['class'] });
+            const timer = setTimeout(() => done(false), timeout);
+        });
+    },
+    // Дамп Select/input страницы для отладки ненайденного селектора
+    selectDump() {
+        const selects = document.querySelectorAll('.ant-select');
+        const inputs = document.querySelectorAll('input');
+        return {
+            ant_selects: selects.length,
+            ant_select_ids: Array.from(selects).map(s => s.querySelector('input')?.id || 'no-id'),
+            all_input_ids: Array.from(inputs).map(i => i.id).filter(id => id),
+            url: window.location.href
+        };
+    }
+};
+"""
+
+# Открытый (не скрытый) dropdown Ant Design Select
+_OPEN_DROPDOWN = '.ant-select-dropdown:not(.ant-select-dropdown-hidden)'
+
+# Фильтрация Ant Design завершена: первая опция открытого dropdown содержит запрос
+_FIRST_OPTION_MATCHES_JS = """(query) => {
+    const dropdown = document.querySelector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)');
+    const first = dropdown && dropdown.querySelector('.ant-select-item-option');
+    return !!first && (first.textContent || '').toLowerCase().includes(query.toLowerCase());
+}"""
+
+# В Ant Design Select с input#id появилось выбранное значение, содержащее ожидаемый текст
+_SELECTION_MATCHES_JS = """([inputSelector, expected]) => {
+    const selection = document.querySelector(inputSelector)
+        ?.closest('.ant-select')?.querySelector('.ant-select-selection-item');
+    const text = (selection?.textContent || '').trim().toLowerCase();
+    return text !== '' && text.includes(expected.toLowerCase());
+}"""
+
+# Пауза между попытками выбора компании/драйвера: экспонента с джиттером, чтобы
+# повторы не попадали в тот же тайминг перерисовки/rate limit
+_RETRY_BASE_DELAY = 1.0
+_RETRY_MAX_DELAY = 30.0
+_RETRY_JITTER = 0.5
+
+
+def _retry_delay_ms(attempt: int) -> int:
+    """Пауза перед попыткой attempt + 1 (attempt с нуля), в миллисекундах."""
+    delay = min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * (2 ** attempt))
+    return int(delay * (1 + random.uniform(0, _RETRY_JITTER)) * 1000)
+
+
+# Извлечение строк таблицы логов за один проход: источник строк выбирается одной
+# проверкой, ячейки берутся из row.cells/row.children без querySelectorAll на строку
+_EXTRACT_LOGS_JS = r"""
+() => {
+    const rows = document.querySelector('.patch-table-row:not(.patch-table-header)')
+        ? document.querySelectorAll('.patch-table-row:not(.patch-table-header)')
+        : document.querySelector('.ant-table-row')
+            ? document.querySelectorAll('.ant-table-row')
+            : document.querySelectorAll('table tbody tr');
+
+    // Строки календаря: в первых двух ячейках только номера дней
+    const CALENDAR = /^\d{1,2}$/;
+    const text = (cell) => (cell ? cell.textContent.trim() : '');
+    const logs = [];
+
+    for (let i = 0; i < rows.length; i++) {
+        const row = rows[i];
+        const c = row.cells && row.cells.length ? row.cells : row.children;
+        const n = c.length;
+        if (n < 5) continue;
+
+        const time = text(c[0]);
+        const event = text(c[1]);
+        if ((!time && !event) || (CALENDAR.test(time) && CALENDAR.test(event))) continue;
+
+        const entry = {
+            time,
+            event,
+            duration: text(c[2]),
+            status: text(c[3]),
+            location: text(c[4]),
+        };
+        if (n >= 6) entry.odometer = text(c[5]);
+        if (n >= 7) entry.eh = text(c[6]);
+        if (n >= 8) entry.notes = text(c[7]);
+        logs.push(entry);
+    }
+
+    return logs;
+}
+"""
+
+
+class CircuitOpenError(Exception):
+    """Raised when company selection keeps failing and is short-circuited for a cool-down."""
+    pass
+
+
+class DateRange(NamedTuple):
+    """Диапазон дат скана: datetime для date picker и строки для отчётов."""
+    start: datetime
+    end: datetime
+    start_str: str
+    end_str: str
+
+
+def _date_range(days_back: int) -> DateRange:
+    """Диапазон из days_back дней, заканчивающийся сегодня (включительно)."""
+    end = datetime.now()
+    start = end - timedelta(days=days_back - 1)
+    return DateRange(start, end, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+
+
+def _format_smart_issue(error: LogCheckError) -> Dict[str, Any]:
+    """Конвертирует ошибку logCheckErrors из Smart Analyze в наш формат issue."""
+    msg = error.errorMessage or ''
+    return {
+        'error_type': error.errorType or error.eventCode or 'compliance_error',
+        'error_name': msg or 'Compliance Error',
+        'description': msg,
+        'severity': 'high' if 'VIOLATION' in msg else 'medium',
+        'category': 'compliance',
+        'metadata': {
+            'eventCode': error.eventCode,
+            'errorTime': error.errorTime,
+            'errorType': error.errorType,
+            'id': error.id,
+            'source': 'smart_analyze_api'
+        }
+    }
+
+
+def _write_json_atomic(file_path: Path, data: Any) -> None:
+    """
+    Пишет JSON во временный файл рядом и атомарно подменяет им file_path.
+
+    Читатель каталога никогда не увидит недописанный файл (blocking).
+    """
+    tmp_path = file_path.with_name(file_path.name + '.tmp')
+    tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, file_path)
+
 
 class LogScannerService:
     """Служба для сканирования логов драйверов через Fortex UI."""
 
-    # Максимум 2 вкладки одновременно чтобы избежать race condition
-    MAX_CONCURRENT_TABS = 2
+    # Каждый драйвер сканируется в собственном изолированном контексте браузера
+    # (без общего состояния страницы), поэтому параллельность ограничена только CPU
+    MAX_CONCURRENT_TABS = min(8, os.cpu_count() or 2)
+
+    # Bulkhead по фазам драйвера: выбор компании/драйвера в UI (падает при
+    # проблемах сайта) и CREATE/LOAD/извлечение (нагрузка на сервер логов)
+    SELECT_CONCURRENCY = 4
+    LOAD_CONCURRENCY = 2
+
+    # Circuit breaker выбора компании: после BREAKER_FAILURE_THRESHOLD неудач подряд
+    # остальные драйверы пропускаются BREAKER_COOLDOWN_SECONDS, затем одна проба
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_COOLDOWN_SECONDS = 60
 
     def __init__(self):
         """Инициализация службы сканирования логов."""
@@ -43,6 +288,23 @@ class LogScannerService:
         self.logs_dir.mkdir(parents=True, exist_ok=True)
         # Semaphore для ограничения параллельных вкладок
         self._tab_semaphore: asyncio.Semaphore | None = None
+        # Bulkhead внутри вкладки: отдельные лимиты на выбор в UI и на загрузку логов
+        self._select_semaphore: asyncio.Semaphore | None = None
+        self._load_semaphore: asyncio.Semaphore | None = None
+        # Пул свободных изолированных контекстов на время scan_drivers_parallel
+        # (залогинены, init-скрипты уже зарегистрированы) вместе с их прогретой
+        # вкладкой /activity; размер ограничен семафором
+        self._idle_contexts: List[Tuple[BrowserContext, Optional[Page]]] = []
+        # Один Fortex API клиент на всё время жизни службы (создаётся лениво)
+        self._fortex_client: FortexAPIClient | None = None
+        # Текст опции компании в dropdown, найденный при первом выборе: {company_name: option_text}
+        self._company_option_cache: dict[str, str] = {}
+        # Состояние circuit breaker выбора компании: closed / open / half-open
+        self._breaker_state = 'closed'
+        self._breaker_failures = 0
+        self._breaker_opened_at = 0.0
+        # Шаговые дебаг-скриншоты: явный флаг или уровень логирования DEBUG (решается один раз)
+        self._debug_screenshots = settings.debug_screenshots or settings.log_level.upper() == 'DEBUG'
 
     async def scan_driver_logs(
         self,
@@ -67,13 +329,12 @@ class LogScannerService:
         Returns:
             Результаты сканирования с логами и обнаруженными проблемами
         """
-        logger.info(f"🔍 Начинаем сканирование логов для драйвера {driver_id[:8]}...")
+        driver_short = driver_id[:8]
+        logger.info(f"🔍 Начинаем сканирование логов для драйвера {driver_short}...")
 
-        # Вычисляем даты
-        today = datetime.now()
-        start_date = today - timedelta(days=days_back - 1)
-        start_date_str = start_date.strftime("%Y-%m-%d")
-        end_date_str = today.strftime("%Y-%m-%d")
+        # Вычисляем даты (и метку времени для файлов) один раз
+        dates = _date_range(days_back)
+        timestamp = dates.end.strftime("%Y%m%d_%H%M%S")
 
         try:
             # Инициализируем браузер
@@ -81,13 +342,7 @@ class LogScannerService:
                 if scan_id:
                     progress_tracker.update_step(scan_id, 'browser_init', 'Инициализация браузера...')
 
-                self.browser_manager = BrowserManager(
-                    headless=settings.playwright_headless,
-                    user_data_dir=settings.playwright_session_dir,
-                    screenshot_dir=settings.playwright_screenshots_dir,
-                )
-                await self.browser_manager.initialize()
-                logger.info("✅ Браузер инициализирован")
+                await self._start_browser()
 
                 # Логин в Fortex
                 if scan_id:
@@ -100,23 +355,13 @@ class LogScannerService:
             if scan_id:
                 progress_tracker.update_step(scan_id, 'navigate', 'Переход на страницу Activity...')
             logger.info("📍 Переход на страницу Activity...")
-            await page.goto(f"{settings.fortex_ui_url.rstrip('/')}/activity", wait_until="networkidle", timeout=30000)
-            await page.wait_for_timeout(5000)  # Увеличили таймаут для полной загрузки
-
-            # Сделаем скриншот перед выбором компании
-            await self.browser_manager.capture_screenshot("before_company_select")
+            await page.goto(f"{settings.fortex_ui_url.rstrip('/')}/activity", wait_until="domcontentloaded", timeout=30000)
+            # Ждём селектор компании вместо networkidle + фиксированной паузы
+            await page.wait_for_selector('#select-company', state='visible', timeout=15000)
 
-            # Блокируем form submit (safety net)
-            try:
-                await page.evaluate('''
-                    () => {
-                        document.querySelectorAll('form').forEach(form => {
-                            form.addEventListener('submit', (e) => { e.preventDefault(); return false; }, true);
-                        });
-                    }
-                ''')
-            except Exception as e:
-                logger.warning(f"⚠️ Не удалось заблокировать form submit: {e}")
+            # Сделаем скриншот перед выбором компании (только в режиме отладки)
+            if self._debug_screenshots:
+                await self.browser_manager.capture_screenshot("before_company_select")
 
             if scan_id:
                 progress_tracker.update_message(scan_id, f"Выбор компании и драйвера...")
@@ -124,15 +369,15 @@ class LogScannerService:
 
             # Выбор компании (если указана)
             if company_name:
-                await self._select_company(page, company_name)
+                await self._select_company_improved(page, company_name)
             else:
                 # Выбираем первую компанию
                 await self._select_first_company(page)
 
             # Выбор драйвера
             if scan_id:
-                progress_tracker.update_step(scan_id, 'select_driver', f'Выбор драйвера {driver_name or driver_id[:8]}...')
-            await self._select_driver_by_id(page, driver_id, driver_name)
+                progress_tracker.update_step(scan_id, 'select_driver', f'Выбор драйвера {driver_name or driver_short}...')
+            await self._select_driver_improved(page, driver_id, driver_name)
 
             # Нажимаем CREATE (открывается новая вкладка)
             if scan_id:
@@ -143,10 +388,10 @@ class LogScannerService:
 
             # Устанавливаем даты
             if scan_id:
-                progress_tracker.update_message(scan_id, f"Установка диапазона дат ({start_date_str} - {end_date_str})...")
-                progress_tracker.update_step(scan_id, 'set_dates', f'Установка дат: {start_date_str} - {end_date_str}...')
+                progress_tracker.update_message(scan_id, f"Установка диапазона дат ({dates.start_str} - {dates.end_str})...")
+                progress_tracker.update_step(scan_id, 'set_dates', f'Установка дат: {dates.start_str} - {dates.end_str}...')
 
-            await self._set_date_range(page, start_date, today)
+            await self._set_date_range(page, dates)
 
             # Нажимаем LOAD
             if scan_id:
@@ -169,21 +414,20 @@ class LogScannerService:
                 progress_tracker.update_message(scan_id, f"Анализ логов на ошибки...")
                 progress_tracker.update_step(scan_id, 'analyze', f'Анализ {len(logs_data)} записей логов...')
 
-            issues = self._analyze_logs(logs_data)
+            issues = await asyncio.to_thread(self._analyze_logs, logs_data)
 
             # Сохраняем результаты
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            driver_short = driver_id[:8]
-
             logs_file = self.logs_dir / f"logs_{driver_short}_{timestamp}.json"
-            self._save_logs(logs_file, logs_data, driver_id, driver_name, start_date_str, end_date_str)
+            await asyncio.to_thread(
+                self._save_logs, logs_file, logs_data, driver_id, driver_name, dates.start_str, dates.end_str
+            )
 
             if scan_id:
                 progress_tracker.update_step(scan_id, 'save_files', 'Сохранение файлов логов...')
 
             if issues:
                 issues_file = self.logs_dir / f"issues_{driver_short}_{timestamp}.json"
-                self._save_issues(issues_file, issues)
+                await asyncio.to_thread(self._save_issues, issues_file, issues)
 
                 # Сохраняем проблемы в базу данных
                 if scan_id:
@@ -210,13 +454,13 @@ class LogScannerService:
                 'logs_file': str(logs_file),
                 'issues_file': str(issues_file) if issues else None,
                 'date_range': {
-                    'start': start_date_str,
-                    'end': end_date_str
+                    'start': dates.start_str,
+                    'end': dates.end_str
                 }
             }
 
         except Exception as e:
-            logger.exception(f"❌ Ошибка сканирования логов для драйвера {driver_id[:8]}: {e}")
+            logger.exception(f"❌ Ошибка сканирования логов для драйвера {driver_short}: {e}")
             return {
                 'success': False,
                 'driver_id': driver_id,
@@ -234,8 +478,10 @@ class LogScannerService:
         """
         Сканирует нескольких драйверов с ограниченной параллельностью.
 
-        ВАЖНО: Используем Semaphore для ограничения до MAX_CONCURRENT_TABS вкладок,
-        чтобы избежать race condition при выборе элементов на странице.
+        Каждый драйвер сканируется в своём изолированном контексте браузера, поэтому
+        выбор компании/драйвера в разных вкладках не конфликтует. Semaphore
+        ограничивает число одновременных контекстов до MAX_CONCURRENT_TABS;
+        контексты переиспользуются следующими драйверами и закрываются в конце скана.
 
         Args:
             drivers: Список драйверов с ключами 'driver_id' и 'driver_name'
@@ -251,12 +497,11 @@ class LogScannerService:
 
         # Инициализируем Semaphore для ограничения параллельности
         self._tab_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_TABS)
+        self._select_semaphore = asyncio.Semaphore(self.SELECT_CONCURRENCY)
+        self._load_semaphore = asyncio.Semaphore(self.LOAD_CONCURRENCY)
 
         # Вычисляем даты один раз для всех
-        today = datetime.now()
-        start_date = today - timedelta(days=days_back - 1)
-        start_date_str = start_date.strftime("%Y-%m-%d")
-        end_date_str = today.strftime("%Y-%m-%d")
+        dates = _date_range(days_back)
 
         try:
             # Инициализируем браузер один раз
@@ -264,65 +509,49 @@ class LogScannerService:
                 if scan_id:
                     progress_tracker.update_step(scan_id, 'browser_init', 'Инициализация браузера...')
 
-                self.browser_manager = BrowserManager(
-                    headless=settings.playwright_headless,
-                    user_data_dir=settings.playwright_session_dir,
-                    screenshot_dir=settings.playwright_screenshots_dir,
-                )
-                await self.browser_manager.initialize()
-                logger.info("✅ Браузер инициализирован")
+                await self._start_browser()
 
                 # Логин в Fortex один раз
                 if scan_id:
                     progress_tracker.update_step(scan_id, 'login', 'Вход в систему Fortex...')
                 await self._login()
 
-            # Создаем задачи для сканирования С СЕМАФОРОМ
+            # Smart Analyze компании один раз на весь скан (а не на каждого драйвера)
+            if scan_id and company_id:
+                progress_tracker.update_step(scan_id, 'smart_analyze', 'Получение ошибок из Smart Analyze...')
+            smart_index = await self._fetch_smart_index(company_id) if company_id else None
+
+            # Создаем задачи для сканирования С СЕМАФОРОМ в TaskGroup: прогресс
+            # обновляется сразу, как только очередной драйвер завершён
             tasks = []
-            for idx, driver_info in enumerate(drivers):
-                driver_id = driver_info.get('driver_id')
-                driver_name = driver_info.get('driver_name')
+            async with asyncio.TaskGroup() as tg:
+                for idx, driver_info in enumerate(drivers):
+                    driver_id = driver_info.get('driver_id')
+                    driver_name = driver_info.get('driver_name')
+
+                    # Оборачиваем в семафор для ограничения параллельности
+                    task = tg.create_task(self._scan_with_semaphore(
+                        driver_id=driver_id,
+                        driver_name=driver_name,
+                        company_name=company_name,
+                        company_id=company_id,
+                        dates=dates,
+                        scan_id=scan_id,
+                        driver_index=idx,
+                        total_drivers=len(drivers),
+                        smart_index=smart_index
+                    ))
+                    if scan_id:
+                        task.add_done_callback(
+                            lambda _, d=driver_id: progress_tracker.complete_driver(scan_id, d)
+                        )
+                    tasks.append(task)
 
-                if scan_id:
-                    progress_tracker.update_driver(scan_id, idx, driver_id)
-
-                # Оборачиваем в семафор для ограничения параллельности
-                task = self._scan_with_semaphore(
-                    driver_id=driver_id,
-                    driver_name=driver_name,
-                    company_name=company_name,
-                    company_id=company_id,
-                    start_date_str=start_date_str,
-                    end_date_str=end_date_str,
-                    scan_id=scan_id,
-                    driver_index=idx,
-                    total_drivers=len(drivers)
-                )
-                tasks.append(task)
-
-            # Запускаем задачи (Semaphore ограничит параллельность)
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Обрабатываем результаты
-            final_results = []
-            successful_count = 0
-            failed_count = 0
-
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(f"Драйвер {drivers[i].get('driver_id')[:8]} провалился: {result}")
-                    final_results.append({
-                        'success': False,
-                        'driver_id': drivers[i].get('driver_id'),
-                        'error': str(result)
-                    })
-                    failed_count += 1
-                else:
-                    final_results.append(result)
-                    if result.get('success'):
-                        successful_count += 1
-                    else:
-                        failed_count += 1
+            # Обрабатываем результаты (ошибки драйверов уже превращены в результаты)
+            final_results = [task.result() for task in tasks]
+            successful_count = sum(1 for result in final_results if result.get('success'))
+            skipped_count = sum(1 for result in final_results if result.get('skipped'))
+            failed_count = len(final_results) - successful_count - skipped_count
 
             # Определяем общий успех: считаем успешным если хотя бы 1 драйвер просканирован
             overall_success = successful_count > 0
@@ -332,7 +561,8 @@ class LogScannerService:
             # Иначе возникает race condition: frontend может увидеть "completed" раньше,
             # чем agent.py закончит сохранять результаты в БД
 
-            logger.info(f"✅ Сканирование завершено: {successful_count} успешно, {failed_count} провалились")
+            logger.info(f"✅ Сканирование завершено: {successful_count} успешно, {failed_count} провалились, "
+                        f"{skipped_count} пропущено (circuit breaker)")
             return final_results
 
         except Exception as e:
@@ -340,32 +570,49 @@ class LogScannerService:
             # При ошибке ТОЖЕ не вызываем complete_scan - это делает вызывающий код
             raise
 
+        finally:
+            # Контексты засеяны сессией на момент скана - не переносим их в следующий
+            await self._close_idle_contexts()
+
     async def _scan_with_semaphore(
         self,
         driver_id: str,
         driver_name: str,
         company_name: str,
         company_id: str,
-        start_date_str: str,
-        end_date_str: str,
+        dates: DateRange,
         scan_id: str,
         driver_index: int,
-        total_drivers: int
+        total_drivers: int,
+        smart_index: Optional[Dict[str, DriverLog]] = None
     ) -> Dict[str, Any]:
-        """Оборачивает сканирование в Semaphore для ограничения параллельности."""
+        """
+        Оборачивает сканирование в Semaphore для ограничения параллельности.
+
+        Никогда не выбрасывает Exception: ошибка одного драйвера возвращается как
+        результат с success=False и не отменяет остальные задачи TaskGroup.
+        """
         async with self._tab_semaphore:
             logger.info(f"[{driver_index + 1}/{total_drivers}] 🔓 Semaphore acquired, начинаю сканирование {driver_name or driver_id[:8]}...")
-            result = await self._scan_single_driver_in_new_tab(
-                driver_id=driver_id,
-                driver_name=driver_name,
-                company_name=company_name,
-                company_id=company_id,
-                start_date_str=start_date_str,
-                end_date_str=end_date_str,
-                scan_id=scan_id,
-                driver_index=driver_index,
-                total_drivers=total_drivers
-            )
+            try:
+                result = await self._scan_single_driver_in_new_tab(
+                    driver_id=driver_id,
+                    driver_name=driver_name,
+                    company_name=company_name,
+                    company_id=company_id,
+                    dates=dates,
+                    scan_id=scan_id,
+                    driver_index=driver_index,
+                    total_drivers=total_drivers,
+                    smart_index=smart_index
+                )
+            except Exception as e:
+                logger.error(f"Драйвер {driver_id[:8]} провалился: {e}")
+                result = {
+                    'success': False,
+                    'driver_id': driver_id,
+                    'error': str(e)
+                }
             logger.info(f"[{driver_index + 1}/{total_drivers}] 🔒 Semaphore released")
             return result
 
@@ -375,148 +622,83 @@ class LogScannerService:
         driver_name: str,
         company_name: str,
         company_id: str,
-        start_date_str: str,
-        end_date_str: str,
+        dates: DateRange,
         scan_id: str,
         driver_index: int,
-        total_drivers: int
+        total_drivers: int,
+        smart_index: Optional[Dict[str, DriverLog]] = None
     ) -> Dict[str, Any]:
-        """Сканирует одного драйвера в отдельной вкладке."""
+        """
+        Сканирует одного драйвера в отдельной вкладке.
+
+        smart_index — результат Smart Analyze компании по driver_id (общий для всех
+        драйверов скана); None означает, что Smart Analyze недоступен и
+        используется базовый анализ логов.
+        """
+        driver_short = driver_id[:8]
         try:
             logger.info(f"[{driver_index + 1}/{total_drivers}] 🚀 Начало сканирования:")
             logger.info(f"  - Компания: {company_name or 'не указана'}")
-            logger.info(f"  - Драйвер: {driver_name or driver_id[:8]}")
+            logger.info(f"  - Драйвер: {driver_name or driver_short}")
             logger.info(f"  - Driver ID: {driver_id}")
             logger.info(f"  - Company ID: {company_id}")
 
-            # Создаем новую вкладку для этого драйвера
-            page = await self.browser_manager.context.new_page()
+            # Берём изолированный контекст (уже залогиненный) из пула для этого драйвера
+            context, activity_page = await self._acquire_context()
+            reusable = False
 
             try:
-                # Переход на Activity с увеличенным таймаутом
-                logger.info(f"[{driver_index + 1}/{total_drivers}] Переход на /activity...")
-                await page.goto(f"{settings.fortex_ui_url.rstrip('/')}/activity", wait_until="networkidle", timeout=60000)
-
-                # КРИТИЧНО: Ждём полной загрузки страницы и всех компонентов
-                logger.info(f"[{driver_index + 1}/{total_drivers}] Ожидание полной загрузки страницы...")
-                await page.wait_for_timeout(3000)  # Базовое ожидание
-
-                # Ждём появления критических элементов
-                try:
-                    await page.wait_for_selector('#select-company', state='visible', timeout=15000)
-                    logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ Селектор компании готов")
-                except Exception as e:
-                    logger.error(f"[{driver_index + 1}/{total_drivers}] ❌ Селектор компании не появился: {e}")
-                    await self.browser_manager.capture_screenshot(f"ERROR_no_company_selector_{driver_index}")
-                    raise Exception(f"Company selector not found after page load")
-
-                logger.info(f"[{driver_index + 1}/{total_drivers}] Страница загружена: {page.url}")
-
-                # Блокируем form submit (safety net)
-                try:
-                    await page.evaluate('''
-                        () => {
-                            document.querySelectorAll('form').forEach(form => {
-                                form.addEventListener('submit', (e) => { e.preventDefault(); return false; }, true);
-                            });
-                        }
-                    ''')
-                    logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ Form submit заблокирован")
-                except Exception as e:
-                    logger.warning(f"[{driver_index + 1}/{total_drivers}] ⚠️ Не удалось заблокировать form submit: {e}")
-
-                # Выбор компании - ОБЯЗАТЕЛЬНО указываем конкретную компанию
-                if not company_name:
-                    logger.error(f"[{driver_index + 1}/{total_drivers}] ❌ КРИТИЧЕСКАЯ ОШИБКА: company_name не указан!")
-                    raise Exception("company_name is required - cannot select random company")
+                reused = activity_page is not None and '/activity' in activity_page.url
+                if reused:
+                    # Вкладка /activity от предыдущего драйвера: SPA уже загружена, не перезагружаем
+                    logger.info(f"[{driver_index + 1}/{total_drivers}] ♻️ Переиспользуем прогретую вкладку /activity")
+                    page = activity_page
+                else:
+                    activity_page = page = await context.new_page()
 
-                logger.info(f"[{driver_index + 1}/{total_drivers}] Выбираем компанию: {company_name}")
-                await self._select_company_improved(page, company_name, driver_index, total_drivers)
+                    # Переход на Activity с увеличенным таймаутом
+                    logger.info(f"[{driver_index + 1}/{total_drivers}] Переход на /activity...")
+                    await page.goto(f"{settings.fortex_ui_url.rstrip('/')}/activity", wait_until="domcontentloaded", timeout=60000)
 
-                # Выбор драйвера с улучшенной логикой
-                # RETRY: Если страница обновилась и компания потерялась - выбираем заново
-                max_driver_attempts = 2
-                for driver_attempt in range(max_driver_attempts):
+                    # КРИТИЧНО: Ждём появления критических элементов (сам селектор гейтит дальнейшие шаги)
+                    logger.info(f"[{driver_index + 1}/{total_drivers}] Ожидание загрузки страницы...")
                     try:
-                        logger.info(f"[{driver_index + 1}/{total_drivers}] Выбираем драйвера: {driver_name or driver_id[:8]}")
-                        await self._select_driver_improved(page, driver_id, driver_name, driver_index, total_drivers)
-                        break  # Успех!
+                        await page.wait_for_selector('#select-company', state='visible', timeout=15000)
+                        logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ Селектор компании готов")
                     except Exception as e:
-                        if "Company selection was lost" in str(e) and driver_attempt < max_driver_attempts - 1:
-                            logger.warning(f"[{driver_index + 1}/{total_drivers}] ⚠️ Компания потерялась, перевыбираем...")
-                            # Ждём загрузки страницы
-                            await page.wait_for_timeout(2000)
-                            try:
-                                await page.wait_for_load_state('networkidle', timeout=10000)
-                            except Exception:
-                                pass
-                            # Пере-выбираем компанию
-                            await self._select_company_improved(page, company_name, driver_index, total_drivers)
-                        else:
-                            raise
-
-                # Нажимаем CREATE (открывается новая вкладка)
-                page = await self._click_create(page)
-
-                # Выбираем даты
-                await self._select_dates(page, start_date_str, end_date_str)
+                        logger.error(f"[{driver_index + 1}/{total_drivers}] ❌ Селектор компании не появился: {e}")
+                        await self.browser_manager.capture_screenshot(f"ERROR_no_company_selector_{driver_index}")
+                        raise Exception(f"Company selector not found after page load")
 
-                # Нажимаем LOAD
-                await self._click_load(page)
+                    logger.info(f"[{driver_index + 1}/{total_drivers}] Страница загружена: {page.url}")
 
-                # Извлекаем логи
-                logs = await self._extract_logs(page)
+                # Выбор компании - ОБЯЗАТЕЛЬНО указываем конкретную компанию
+                if not company_name:
+                    logger.error(f"[{driver_index + 1}/{total_drivers}] ❌ КРИТИЧЕСКАЯ ОШИБКА: company_name не указан!")
+                    raise Exception("company_name is required - cannot select random company")
 
-                # Получаем ошибки из Smart Analyze API
-                formatted_issues = []
-                if scan_id and company_id:
-                    progress_tracker.update_step(scan_id, 'smart_analyze', f'Получение ошибок из Smart Analyze для {driver_name}...')
-
-                try:
-                    logger.info(f"[{driver_index + 1}/{total_drivers}] 🤖 Получение Smart Analyze данных...")
-                    from app.fortex.client import FortexAPIClient
-                    from app.config import get_settings
-
-                    settings_obj = get_settings()
-                    fortex = FortexAPIClient(
-                        base_url=settings_obj.fortex_api_url,
-                        auth_token=settings_obj.fortex_auth_token
+                # Bulkhead: выбор в UI и загрузка логов ограничены отдельными семафорами,
+                # поэтому зависший выбор компании не занимает слоты LOAD (и наоборот)
+                async with self._select_semaphore:
+                    await self._select_company_and_driver(
+                        page, company_name, driver_id, driver_name, driver_index, total_drivers, reused
                     )
+                async with self._load_semaphore:
+                    logs = await self._load_logs_in_new_tab(page, dates)
 
-                    # Получаем Smart Analyze для компании
-                    smart_result = await fortex.get_smart_analyze(company_id)
-                    await fortex.close()
-
-                    # Ищем нашего драйвера в результате
-                    if smart_result and smart_result.drivers:
-                        for driver_log in smart_result.drivers:
-                            driver_log_id = driver_log.driver_id or driver_log.driverId
-                            if driver_log_id == driver_id:
-                                # Нашли! Конвертируем logCheckErrors в наш формат
-                                if driver_log.logCheckErrors:
-                                    for error in driver_log.logCheckErrors:
-                                        formatted_issues.append({
-                                            'error_type': error.errorType or error.eventCode or 'compliance_error',
-                                            'error_name': error.errorMessage or 'Compliance Error',
-                                            'description': error.errorMessage or '',
-                                            'severity': 'high' if 'VIOLATION' in (error.errorMessage or '') else 'medium',
-                                            'category': 'compliance',
-                                            'metadata': {
-                                                'eventCode': error.eventCode,
-                                                'errorTime': error.errorTime,
-                                                'errorType': error.errorType,
-                                                'id': error.id,
-                                                'source': 'smart_analyze_api'
-                                            }
-                                        })
-                                    logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ Smart Analyze нашел {len(formatted_issues)} ошибок")
-                                else:
-                                    logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ Smart Analyze: ошибок не обнаружено")
-                                break
-                except Exception as e:
-                    logger.error(f"[{driver_index + 1}/{total_drivers}] ❌ Ошибка Smart Analyze: {e}")
+                # Ошибки из Smart Analyze API (получены один раз в scan_drivers_parallel)
+                formatted_issues = []
+                driver_log = smart_index.get(driver_id) if smart_index is not None else None
+                if driver_log is not None:
+                    # Нашли! Конвертируем logCheckErrors в наш формат
+                    if driver_log.logCheckErrors:
+                        formatted_issues = [_format_smart_issue(error) for error in driver_log.logCheckErrors]
+                        logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ Smart Analyze нашел {len(formatted_issues)} ошибок")
+                    else:
+                        logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ Smart Analyze: ошибок не обнаружено")
+                elif smart_index is None:
                     # Если Smart Analyze провалился, используем базовый анализ логов
-                    issues = self._analyze_logs(logs)
+                    issues = await asyncio.to_thread(self._analyze_logs, logs)
                     for issue in issues:
                         formatted_issues.append({
                             'error_type': issue.get('issue_type', 'log_error'),
@@ -535,15 +717,13 @@ class LogScannerService:
 
                 # Сохраняем в файлы
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                logs_file = self.logs_dir / f"logs_{driver_id[:8]}_{timestamp}.json"
-                with open(logs_file, 'w', encoding='utf-8') as f:
-                    json.dump(logs, f, indent=2, ensure_ascii=False)
+                logs_file = self.logs_dir / f"logs_{driver_short}_{timestamp}.json"
+                await asyncio.to_thread(_write_json_atomic, logs_file, logs)
 
                 issues_file = None
                 if formatted_issues:  # FIX: было 'issues', теперь 'formatted_issues'
-                    issues_file = self.logs_dir / f"issues_{driver_id[:8]}_{timestamp}.json"
-                    with open(issues_file, 'w', encoding='utf-8') as f:
-                        json.dump(formatted_issues, f, indent=2, ensure_ascii=False)
+                    issues_file = self.logs_dir / f"issues_{driver_short}_{timestamp}.json"
+                    await asyncio.to_thread(_write_json_atomic, issues_file, formatted_issues)
 
                 # Сохраняем в БД
                 await self._save_logs_to_database(
@@ -555,6 +735,7 @@ class LogScannerService:
                 )
 
                 logger.info(f"[{driver_index + 1}/{total_drivers}] ✅ {driver_name}: {len(logs)} логов, {len(formatted_issues)} проблем")
+                reusable = True
 
                 return {
                     'success': True,
@@ -566,17 +747,28 @@ class LogScannerService:
                     'logs_file': str(logs_file),
                     'issues_file': str(issues_file) if formatted_issues else None,
                     'date_range': {
-                        'start': start_date_str,
-                        'end': end_date_str
+                        'start': dates.start_str,
+                        'end': dates.end_str
                     }
                 }
 
             finally:
-                # Закрываем вкладку этого драйвера
-                await page.close()
+                # Возвращаем контекст (с вкладкой /activity) в пул; после ошибки его
+                # состояние неизвестно - закрываем
+                await self._release_context(context, activity_page, reusable)
+
+        except CircuitOpenError as e:
+            logger.warning(f"[{driver_index + 1}/{total_drivers}] ⏭️ {driver_short} пропущен: {e}")
+            return {
+                'success': False,
+                'skipped': True,
+                'driver_id': driver_id,
+                'driver_name': driver_name,
+                'error': str(e)
+            }
 
         except Exception as e:
-            logger.exception(f"[{driver_index + 1}/{total_drivers}] ❌ Ошибка для {driver_id[:8]}: {e}")
+            logger.exception(f"[{driver_index + 1}/{total_drivers}] ❌ Ошибка для {driver_short}: {e}")
             return {
                 'success': False,
                 'driver_id': driver_id,
@@ -584,13 +776,175 @@ class LogScannerService:
                 'error': str(e)
             }
 
+    async def _select_company_and_driver(
+        self,
+        page,
+        company_name: str,
+        driver_id: str,
+        driver_name: str,
+        driver_index: int,
+        total_drivers: int,
+        reused: bool
+    ):
+        """Выбирает компанию (если ещё не выбрана) и драйвера на вкладке /activity."""
+        prefix = f"[{driver_index + 1}/{total_drivers}]"
+        driver_short = driver_id[:8]
+
+        # На прогретой вкладке компания обычно уже выбрана предыдущим драйвером
+        current_company = ''
+        if reused:
+            current_company = await page.evaluate("__pthora.selection('#select-company').value")
+        if current_company and company_name.lower() in current_company.lower():
+            logger.info(f"{prefix} ✅ Компания '{current_company}' уже выбрана")
+        else:
+            logger.info(f"{prefix} Выбираем компанию: {company_name}")
+            await self._select_company_improved(page, company_name, driver_index, total_drivers)
+
+        # Выбор драйвера с улучшенной логикой
+        # RETRY: Если страница обновилась и компания потерялась - выбираем заново
+        max_driver_attempts = 2
+        for driver_attempt in range(max_driver_attempts):
+            try:
+                logger.info(f"{prefix} Выбираем драйвера: {driver_name or driver_short}")
+                await self._select_driver_improved(page, driver_id, driver_name, driver_index, total_drivers)
+                break  # Успех!
+            except Exception as e:
+                if "Company selection was lost" in str(e) and driver_attempt < max_driver_attempts - 1:
+                    logger.warning(f"{prefix} ⚠️ Компания потерялась, перевыбираем...")
+                    # Ждём, пока селектор компании появится и спиннеры исчезнут
+                    try:
+                        await page.wait_for_function(
+                            "() => document.querySelector('#select-company') && !document.querySelector('.ant-spin-spinning')",
+                            timeout=10000
+                        )
+                    except Exception:
+                        pass
+                    # Пере-выбираем компанию
+                    await self._select_company_improved(page, company_name, driver_index, total_drivers)
+                else:
+                    raise
+
+    async def _load_logs_in_new_tab(self, page, dates: DateRange) -> List[Dict[str, Any]]:
+        """CREATE -> даты -> LOAD на новой вкладке; возвращает извлечённые логи."""
+        # Нажимаем CREATE (открывается новая вкладка)
+        page = await self._click_create(page)
+
+        # Выбираем даты
+        await self._set_date_range(page, dates)
+
+        # Нажимаем LOAD
+        await self._click_load(page)
+
+        # Извлекаем логи
+        return await self._extract_logs(page)
+
+    async def _acquire_context(self) -> Tuple[BrowserContext, Optional[Page]]:
+        """
+        Берёт свободный изолированный контекст из пула или создаёт новый.
+
+        Returns:
+            (контекст, его вкладка /activity от предыдущего драйвера или None)
+        """
+        if self._idle_contexts:
+            return self._idle_contexts.pop()
+
+        context = await self.browser_manager.new_isolated_context()
+        await context.add_init_script(_BLOCK_FORM_SUBMIT_JS)
+        await context.add_init_script(_PAGE_HELPERS_JS)
+        return context, None
+
+    async def _release_context(self, context: BrowserContext, worker_page: Optional[Page], reusable: bool):
+        """
+        Возвращает контекст в пул (или закрывает целиком).
+
+        Все вкладки, кроме worker_page (/activity), закрываются - вкладка логов
+        от CREATE у каждого драйвера своя.
+        """
+        if not reusable:
+            await context.close()
+            return
+
+        try:
+            for page in context.pages:
+                if page is not worker_page:
+                    await page.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось закрыть вкладки контекста, закрываем контекст: {e}")
+            await context.close()
+            return
+        self._idle_contexts.append((context, worker_page))
+
+    async def _close_idle_contexts(self):
+        """Закрывает все свободные контексты пула."""
+        idle, self._idle_contexts = self._idle_contexts, []
+        for context, _ in idle:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка закрытия контекста: {e}")
+
+    async def _fetch_smart_index(self, company_id: str) -> Optional[Dict[str, DriverLog]]:
+        """
+        Получает Smart Analyze компании и индексирует драйверов по driver_id.
+
+        Returns:
+            {driver_id: DriverLog} или None, если Smart Analyze недоступен
+        """
+        try:
+            logger.info(f"🤖 Получение Smart Analyze данных для компании {company_id}...")
+            smart_result = await self._get_fortex_client().get_smart_analyze(company_id)
+        except Exception as e:
+            logger.error(f"❌ Ошибка Smart Analyze: {e}")
+            return None
+
+        drivers = smart_result.drivers if smart_result else []
+        return {driver_log.driver_id: driver_log for driver_log in drivers}
+
+    def _get_fortex_client(self) -> FortexAPIClient:
+        """Возвращает общий Fortex API клиент, создавая его при первом вызове."""
+        if self._fortex_client is None:
+            self._fortex_client = FortexAPIClient(
+                base_url=settings.fortex_api_url,
+                auth_token=settings.fortex_auth_token
+            )
+        return self._fortex_client
+
+    async def _start_browser(self):
+        """Запускает браузер и один раз регистрирует блокировку form submit."""
+        self.browser_manager = BrowserManager(
+            headless=settings.playwright_headless,
+            user_data_dir=settings.playwright_session_dir,
+            screenshot_dir=settings.playwright_screenshots_dir,
+            full_page_screenshots=settings.playwright_full_page_screenshots,
+            lightweight=settings.playwright_lightweight,
+            dev_mode=settings.playwright_dev_mode,
+        )
+        await self.browser_manager.initialize()
+
+        # Блокируем form submit (safety net) на каждой странице и вкладке контекста,
+        # включая формы, добавленные позже. Только preventDefault — React-обработчики
+        # (в т.ч. форма логина) продолжают получать событие.
+        await self.browser_manager.context.add_init_script(_BLOCK_FORM_SUBMIT_JS)
+        # window.__pthora.* хелперы для выбора компании/драйвера
+        await self.browser_manager.context.add_init_script(_PAGE_HELPERS_JS)
+        logger.info("✅ Браузер инициализирован")
+
     async def _login(self):
-        """Логин в Fortex UI."""
+        """
+        Логин в Fortex UI.
+
+        Контекст браузера поднимается с сохранённой сессией (session_state.json),
+        поэтому при тёплом старте форма логина не открывается и метод сразу выходит.
+        """
         logger.info("🔐 Вход в систему Fortex...")
         page = self.browser_manager.page
 
         await page.goto(settings.fortex_ui_url)
-        await page.wait_for_timeout(2000)
+        # Даём SPA время на редирект на /login, но не дольше прежних 2 секунд
+        try:
+            await page.wait_for_load_state('networkidle', timeout=2000)
+        except Exception:
+            pass
 
         # Проверяем, нужен ли логин
         if "login" not in page.url.lower():
@@ -608,11 +962,15 @@ class LogScannerService:
         login_button = await page.wait_for_selector('button:has-text("LOGIN")', timeout=10000)
         await login_button.click()
 
-        # Ждем навигации
-        await page.wait_for_timeout(5000)
+        # Ждем ухода со страницы логина (вместо фиксированных 5 секунд)
+        try:
+            await page.wait_for_url(lambda url: "login" not in url.lower(), timeout=15000)
+        except Exception:
+            pass
 
         if "login" not in page.url.lower():
             logger.info("✅ Успешный вход!")
+            await self.browser_manager.save_session()
         else:
             raise Exception("Не удалось войти в систему")
 
@@ -635,23 +993,139 @@ class LogScannerService:
         return False
 
     async def _debug_screenshot(self, page, name: str):
-        """Делает скриншот для отладки на ПРАВИЛЬНОЙ странице (не main page)."""
+        """
+        Делает скриншот для отладки на ПРАВИЛЬНОЙ странице (не main page).
+
+        Шаговые скриншоты снимаются только при settings.debug_screenshots или
+        log_level=DEBUG, ошибки (ERROR/FAILURE в имени) - всегда. Формат JPEG:
+        в разы быстрее PNG.
+        """
+        if not self._debug_screenshots and 'ERROR' not in name and 'FAILURE' not in name:
+            return
         try:
             screenshot_dir = Path(settings.playwright_screenshots_dir)
             screenshot_dir.mkdir(parents=True, exist_ok=True)
             timestamp = datetime.now().strftime("%H%M%S")
-            filepath = screenshot_dir / f"DEBUG_{name}_{timestamp}.png"
-            await page.screenshot(path=str(filepath))
+            filepath = screenshot_dir / f"DEBUG_{name}_{timestamp}.jpg"
+            await page.screenshot(path=str(filepath), full_page=False, type='jpeg', quality=70)
             logger.info(f"📸 Скриншот: {filepath.name}")
         except Exception as e:
             logger.warning(f"⚠️ Не удалось сделать скриншот {name}: {e}")
 
+    async def _enter_search(self, page, input_selector: str, text: str, attempt: int):
+        """
+        Вводит поисковый запрос в Ant Design Select.
+
+        fill() заменяет значение одним input-событием - фильтру Ant Design этого
+        достаточно, без 80 мс на символ. На последней попытке печатаем посимвольно
+        на случай сборки, которой нужны события клавиш.
+        """
+        if attempt < 2:
+            await page.fill(input_selector, text)
+            return
+
+        # fill('') очищает поле атомарно, без гонки между Control+A и Backspace
+        await page.fill(input_selector, '')
+        await page.keyboard.type(text, delay=80)
+
+    async def _wait_for_dropdown(self, page, timeout: int = 3000) -> bool:
+        """
+        Ждёт открытия dropdown Ant Design Select; False по таймауту.
+
+        Ожидание идёт внутри страницы (MutationObserver в __pthora.awaitDropdown),
+        один evaluate вместо опроса wait_for_selector.
+        """
+        try:
+            return await page.evaluate("([t]) => __pthora.awaitDropdown(t)", [timeout])
+        except Exception:
+            return False
+
+    async def _wait_for_filtered_options(self, page, query: str, timeout: int = 5000) -> bool:
+        """Ждёт, пока первая опция dropdown совпадёт с введённым запросом; False по таймауту."""
+        try:
+            await page.wait_for_function(_FIRST_OPTION_MATCHES_JS, arg=query, timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _wait_for_selection(self, page, input_selector: str, expected: str, timeout: int = 5000) -> bool:
+        """Ждёт выбранное значение в Select (содержащее expected); False по таймауту."""
+        try:
+            await page.wait_for_function(_SELECTION_MATCHES_JS, arg=[input_selector, expected], timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def _check_breaker(self):
+        """
+        Пропускает выбор компании, пока breaker открыт.
+
+        После cool-down breaker переходит в half-open и пропускает ровно одну
+        пробу; остальные драйверы ждут её результата (тоже CircuitOpenError).
+        """
+        if self._breaker_state == 'closed':
+            return
+        if self._breaker_state == 'open' and time.monotonic() - self._breaker_opened_at >= self.BREAKER_COOLDOWN_SECONDS:
+            logger.info("🔌 Circuit breaker: half-open, пробуем выбрать компанию")
+            self._breaker_state = 'half-open'
+            return
+        raise CircuitOpenError(
+            f"Выбор компании временно отключён после {self._breaker_failures} неудач подряд"
+        )
+
+    def _record_company_result(self, success: bool):
+        """Обновляет circuit breaker по итогу выбора компании."""
+        if success:
+            if self._breaker_state != 'closed':
+                logger.info("🔌 Circuit breaker: closed")
+            self._breaker_state = 'closed'
+            self._breaker_failures = 0
+            return
+
+        self._breaker_failures += 1
+        if self._breaker_state == 'half-open' or self._breaker_failures >= self.BREAKER_FAILURE_THRESHOLD:
+            logger.error(f"🔌 Circuit breaker: open на {self.BREAKER_COOLDOWN_SECONDS} с "
+                         f"({self._breaker_failures} неудач выбора компании подряд)")
+            self._breaker_state = 'open'
+            self._breaker_opened_at = time.monotonic()
+
+    @staticmethod
+    def _is_unrecoverable(page, error: Exception) -> bool:
+        """
+        Ошибка, которую повтор на этой же странице не исправит.
+
+        Сессия слетела (редирект на логин) или выбор компании потерян
+        перезагрузкой - нужна повторная навигация, а не ещё один клик.
+        """
+        return 'login' in page.url.lower() or 'selection was lost' in str(error)
+
+    async def _click_option(self, option, prefix: str) -> bool:
+        """
+        Кликает по опции dropdown мышью через Locator (auto-wait + повтор при перерисовке).
+
+        Если обычный клик не прошёл проверки видимости/перекрытия, пробуем force click.
+        """
+        try:
+            await option.click(timeout=3000)
+            logger.debug(f"{prefix} ✅ Клик по опции")
+            return True
+        except Exception as e:
+            logger.warning(f"{prefix} ⚠️ Клик по опции не прошёл ({e}), пробуем force click...")
+        try:
+            await option.click(force=True, timeout=3000)
+            logger.debug(f"{prefix} ✅ Force click сработал")
+            return True
+        except Exception as e:
+            logger.error(f"{prefix} ❌ Force click не сработал: {e}")
+            return False
+
     async def _select_company_improved(self, page, company_name: str, driver_index: int = 0, total_drivers: int = 1):
         """
         Выбор компании в Ant Design Select с дебаг-скриншотами на каждом шаге.
-        Используем КЛИК ПО КООРДИНАТАМ вместо Enter (Enter вызывает перезагрузку Fortex).
+        Используем КЛИК МЫШЬЮ по опции вместо Enter (Enter вызывает перезагрузку Fortex).
         """
         prefix = f"[{driver_index + 1}/{total_drivers}]"
+        self._check_breaker()
         logger.info(f"{prefix} 🏢 === НАЧАЛО ВЫБОРА КОМПАНИИ: '{company_name}' ===")
 
         # Скриншот начального состояния
@@ -663,12 +1137,12 @@ class LogScannerService:
                 logger.info(f"{prefix} --- Попытка {attempt + 1}/{max_attempts} ---")
 
                 # ШАГ 1: Ждём появления селектора компании
-                logger.info(f"{prefix} Шаг 1: Ищем селектор компании...")
+                logger.debug(f"{prefix} Шаг 1: Ищем селектор компании...")
                 select_found = False
                 for selector in ['#select-company', '[id*="company"]', '.ant-select input']:
                     try:
                         await page.wait_for_selector(selector, state='visible', timeout=5000)
-                        logger.info(f"{prefix} ✅ Шаг 1: Селектор найден: '{selector}'")
+                        logger.debug(f"{prefix} ✅ Шаг 1: Селектор найден: '{selector}'")
                         select_found = True
                         break
                     except Exception:
@@ -676,208 +1150,143 @@ class LogScannerService:
 
                 if not select_found:
                     # Дампим HTML для отладки
-                    html_dump = await page.evaluate('''
-                        () => {
-                            const selects = document.querySelectorAll('.ant-select');
-                            const inputs = document.querySelectorAll('input');
-                            return {
-                                ant_selects: selects.length,
-                                ant_select_ids: Array.from(selects).map(s => s.querySelector('input')?.id || 'no-id'),
-                                all_input_ids: Array.from(inputs).map(i => i.id).filter(id => id),
-                                url: window.location.href
-                            };
-                        }
-                    ''')
+                    html_dump = await page.evaluate("__pthora.selectDump()")
                     logger.error(f"{prefix} ❌ Шаг 1: Селектор НЕ найден! HTML-дамп: {html_dump}")
                     await self._debug_screenshot(page, f"company_ERROR_no_selector_{driver_index}")
                     raise Exception(f"Селектор компании не найден. Дамп: {html_dump}")
 
-                await page.wait_for_timeout(1000)
-
                 # ШАГ 2: Кликаем по РОДИТЕЛЬСКОМУ контейнеру .ant-select
                 # (клик по input с force=True может не открыть dropdown правильно)
-                logger.info(f"{prefix} Шаг 2: Кликаем по селектору компании...")
-                clicked_selector = await page.evaluate('''
-                    () => {
-                        const input = document.querySelector('#select-company');
-                        if (!input) return null;
-                        const antSelect = input.closest('.ant-select');
-                        if (antSelect) {
-                            const selector_el = antSelect.querySelector('.ant-select-selector');
-                            if (selector_el) {
-                                selector_el.setAttribute('data-pthora-click', 'company');
-                                return '[data-pthora-click="company"]';
-                            }
-                        }
-                        return null;
-                    }
-                ''')
+                logger.debug(f"{prefix} Шаг 2: Кликаем по селектору компании...")
+                clicked_selector = await page.evaluate("__pthora.markSelector('#select-company', 'company')")
 
                 if clicked_selector:
                     await page.click(clicked_selector)
-                    logger.info(f"{prefix} ✅ Шаг 2: Клик по {clicked_selector}")
+                    logger.debug(f"{prefix} ✅ Шаг 2: Клик по {clicked_selector}")
                 else:
                     await page.click('#select-company')
-                    logger.info(f"{prefix} ✅ Шаг 2: Клик по #select-company (fallback)")
+                    logger.debug(f"{prefix} ✅ Шаг 2: Клик по #select-company (fallback)")
 
-                await page.wait_for_timeout(800)
+                await self._wait_for_dropdown(page)
                 await self._debug_screenshot(page, f"company_2_after_click_{driver_index}")
 
                 # ШАГ 3: Очищаем и вводим имя компании
-                logger.info(f"{prefix} Шаг 3: Вводим '{company_name}'...")
-                await page.keyboard.press('Control+A')
-                await page.wait_for_timeout(100)
-                await page.keyboard.press('Backspace')
-                await page.wait_for_timeout(100)
-                await page.keyboard.type(company_name, delay=80)
-                await page.wait_for_timeout(2500)  # Ждём фильтрации Ant Design
-                await self._debug_screenshot(page, f"company_3_after_type_{driver_index}")
-
-                # ШАГ 4: Проверяем что dropdown открылся
-                logger.info(f"{prefix} Шаг 4: Проверяем dropdown...")
-                dropdown_visible = False
-                try:
-                    await page.wait_for_selector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)', timeout=5000)
-                    dropdown_visible = True
-                    logger.info(f"{prefix} ✅ Шаг 4: Dropdown виден")
-                except Exception:
-                    logger.warning(f"{prefix} ⚠️ Шаг 4: Dropdown НЕ виден!")
-                    await self._debug_screenshot(page, f"company_ERROR_no_dropdown_{driver_index}")
-
-                if not dropdown_visible:
-                    # Пробуем кликнуть ещё раз
-                    logger.info(f"{prefix} Повторный клик по селектору...")
-                    await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
-                    if clicked_selector:
-                        await page.click(clicked_selector)
-                    else:
-                        await page.click('#select-company')
-                    await page.wait_for_timeout(500)
-                    await page.keyboard.type(company_name, delay=80)
-                    await page.wait_for_timeout(2500)
+                logger.debug(f"{prefix} Шаг 3: Вводим '{company_name}'...")
+                await self._enter_search(page, '#select-company', company_name, attempt)
+
+                # Опция уже известна с прошлого выбора: ждём именно её и
+                # пропускаем поиск опций (шаги 4-5)
+                cached_option = None
+                cached_text = self._company_option_cache.get(company_name)
+                if cached_text:
+                    cached_option = page.locator(
+                        '.ant-select-dropdown:not(.ant-select-dropdown-hidden) .ant-select-item-option'
+                    ).filter(has_text=cached_text).first
                     try:
-                        await page.wait_for_selector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)', timeout=5000)
-                        dropdown_visible = True
+                        await cached_option.wait_for(state='visible', timeout=5000)
+                        logger.debug(f"{prefix} ⚡ Шаг 3: Опция '{cached_text}' найдена по кэшу")
                     except Exception:
-                        pass
+                        logger.warning(f"{prefix} ⚠️ Кэшированная опция '{cached_text}' не появилась, ищем заново")
+                        self._company_option_cache.pop(company_name, None)
+                        cached_option = None
 
-                if not dropdown_visible:
-                    logger.error(f"{prefix} ❌ Dropdown не открылся после 2 попыток")
-                    await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
-                    continue
+                filtered = False
+                if cached_option is None:
+                    filtered = await self._wait_for_filtered_options(page, company_name)  # Ждём фильтрации Ant Design
+                await self._debug_screenshot(page, f"company_3_after_type_{driver_index}")
 
-                # ШАГ 5: Находим все опции в dropdown
-                logger.info(f"{prefix} Шаг 5: Ищем опции в dropdown...")
-                options_info = await page.evaluate('''
-                    () => {
-                        const dropdown = document.querySelector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)');
-                        if (!dropdown) return { found: false, html: 'NO DROPDOWN' };
-                        const options = dropdown.querySelectorAll('.ant-select-item-option');
-                        return {
-                            found: true,
-                            count: options.length,
-                            texts: Array.from(options).slice(0, 5).map(o => o.textContent?.trim()),
-                            html: dropdown.innerHTML.substring(0, 500)
-                        };
-                    }
-                ''')
-                logger.info(f"{prefix} Опции в dropdown: {options_info}")
-                await self._debug_screenshot(page, f"company_5_dropdown_options_{driver_index}")
+                if cached_option is None:
+                    # ШАГ 4: Проверяем что dropdown открылся (уже известно, если фильтрация дождалась опций)
+                    logger.debug(f"{prefix} Шаг 4: Проверяем dropdown...")
+                    dropdown_visible = filtered
+                    if not dropdown_visible:
+                        dropdown_visible = await self._wait_for_dropdown(page, timeout=5000)
+                        if not dropdown_visible:
+                            logger.warning(f"{prefix} ⚠️ Шаг 4: Dropdown НЕ виден!")
+                            await self._debug_screenshot(page, f"company_ERROR_no_dropdown_{driver_index}")
+                    if dropdown_visible:
+                        logger.debug(f"{prefix} ✅ Шаг 4: Dropdown виден")
+
+                    if not dropdown_visible:
+                        # Пробуем кликнуть ещё раз
+                        logger.debug(f"{prefix} Повторный клик по селектору...")
+                        await page.keyboard.press('Escape')
+                        if clicked_selector:
+                            await page.click(clicked_selector)
+                        else:
+                            await page.click('#select-company')
+                        # Фильтр сохранился в input - достаточно переоткрыть dropdown, не перепечатываем
+                        if await page.input_value('#select-company') != company_name:
+                            await self._enter_search(page, '#select-company', company_name, attempt)
+                        await self._wait_for_filtered_options(page, company_name)
+                        dropdown_visible = await self._wait_for_dropdown(page, timeout=5000)
+
+                    if not dropdown_visible:
+                        logger.error(f"{prefix} ❌ Dropdown не открылся после 2 попыток")
+                        await page.keyboard.press('Escape')
+                        continue
 
-                if not options_info.get('found') or options_info.get('count', 0) == 0:
-                    logger.warning(f"{prefix} ⚠️ Нет опций в dropdown!")
-                    await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
-                    continue
+                    # ШАГ 5: Находим все опции в dropdown
+                    logger.debug(f"{prefix} Шаг 5: Ищем опции в dropdown...")
+                    # Сопоставление с запросом делается в браузере в том же вызове
+                    options_info = await page.evaluate(
+                        "([q]) => __pthora.dropdownOptions(5, true, q)", [company_name]
+                    )
+                    logger.debug("{} Опции в dropdown: {}", prefix, options_info)
+                    await self._debug_screenshot(page, f"company_5_dropdown_options_{driver_index}")
 
-                # ШАГ 6: Находим подходящую опцию и КЛИКАЕМ по координатам
-                logger.info(f"{prefix} Шаг 6: Кликаем по опции...")
-                first_option = await page.query_selector('.ant-select-dropdown:not(.ant-select-dropdown-hidden) .ant-select-item-option:first-child')
-
-                if not first_option:
-                    # Пробуем альтернативный селектор
-                    first_option = await page.query_selector('.ant-select-dropdown:not(.ant-select-dropdown-hidden) .ant-select-item:first-child')
-
-                clicked = False
-                if first_option:
-                    option_text = await first_option.text_content()
-                    option_text = (option_text or "").strip()
-                    logger.info(f"{prefix} Первая опция: '{option_text}'")
-
-                    # Проверяем соответствие
-                    norm_search = company_name.strip().lower()
-                    norm_result = option_text.lower().replace("  eld", "").replace(" eld", "").strip()
-                    if norm_search not in norm_result and norm_result not in norm_search:
-                        logger.warning(f"{prefix} ⚠️ Результат '{option_text}' не похож на '{company_name}', но кликаем...")
-
-                    # КЛИК ПО КООРДИНАТАМ (НЕ Enter!)
-                    box = await first_option.bounding_box()
-                    if box:
-                        logger.info(f"{prefix} Bounding box: x={box['x']:.0f}, y={box['y']:.0f}, w={box['width']:.0f}, h={box['height']:.0f}")
-                        click_x = box['x'] + box['width'] / 2
-                        click_y = box['y'] + box['height'] / 2
-                        await page.mouse.click(click_x, click_y)
-                        logger.info(f"{prefix} ✅ Клик по координатам ({click_x:.0f}, {click_y:.0f})")
-                        clicked = True
-                    else:
-                        logger.warning(f"{prefix} ⚠️ bounding_box вернул None, пробуем force click...")
-                        try:
-                            await first_option.click(force=True)
-                            clicked = True
-                            logger.info(f"{prefix} ✅ Force click сработал")
-                        except Exception as e:
-                            logger.error(f"{prefix} ❌ Force click не сработал: {e}")
+                    if not options_info.get('found') or options_info.get('count', 0) == 0:
+                        logger.warning(f"{prefix} ⚠️ Нет опций в dropdown!")
+                        await page.keyboard.press('Escape')
+                        continue
+
+                # ШАГ 6: Находим подходящую опцию и КЛИКАЕМ мышью
+                logger.debug(f"{prefix} Шаг 6: Кликаем по опции...")
+                if cached_option is not None:
+                    first_option = cached_option
+                    option_text = ((await first_option.text_content()) or "").strip()
+                elif options_info.get('match'):
+                    # Похожая на запрос опция найдена и помечена браузером на шаге 5
+                    match = options_info['match']
+                    first_option = page.locator(match['selector'])
+                    option_text = match.get('text') or ""
+                    logger.debug(f"{prefix} Опция #{match.get('idx')}: '{option_text}'")
                 else:
-                    logger.error(f"{prefix} ❌ Элемент опции не найден в DOM!")
+                    first_option = page.locator(f'{_OPEN_DROPDOWN} .ant-select-item-option').first
+                    option_text = (options_info.get('texts') or [''])[0] or ""
+                    logger.warning(f"{prefix} ⚠️ Результат '{option_text}' не похож на '{company_name}', но кликаем...")
+
+                # КЛИК МЫШЬЮ через Locator (НЕ Enter!): ждёт, пока опция станет
+                # кликабельной, и заново находит её, если Ant Design перерисовал список
+                clicked = await self._click_option(first_option, prefix)
 
                 if not clicked:
                     logger.error(f"{prefix} ❌ Не удалось кликнуть по опции!")
                     await self._debug_screenshot(page, f"company_ERROR_click_failed_{driver_index}")
                     await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
                     continue
 
-                await page.wait_for_timeout(2000)
+                await self._wait_for_selection(page, '#select-company', company_name)
                 await self._debug_screenshot(page, f"company_6_after_select_{driver_index}")
 
                 # ШАГ 7: ВЕРИФИКАЦИЯ - проверяем что компания выбрана
-                logger.info(f"{prefix} Шаг 7: Верификация выбора...")
-                selected_value = await page.evaluate('''
-                    () => {
-                        const input = document.querySelector('#select-company');
-                        if (!input) return { value: '', error: 'input not found' };
-                        const parent = input.closest('.ant-select');
-                        if (!parent) return { value: '', error: 'ant-select parent not found' };
-                        const selection = parent.querySelector('.ant-select-selection-item');
-                        return {
-                            value: selection?.textContent?.trim() || '',
-                            hasSelection: !!selection,
-                            inputValue: input.value || '',
-                            classList: parent.className
-                        };
-                    }
-                ''')
-                logger.info(f"{prefix} Результат верификации: {selected_value}")
+                logger.debug(f"{prefix} Шаг 7: Верификация выбора...")
+                selected_value = await page.evaluate("__pthora.selection('#select-company')")
+                logger.debug("{} Результат верификации: {}", prefix, selected_value)
 
                 selected_text = selected_value.get('value', '') if isinstance(selected_value, dict) else str(selected_value)
 
                 if selected_text and company_name.lower() in selected_text.lower():
                     logger.info(f"{prefix} ✅✅✅ КОМПАНИЯ '{selected_text}' УСПЕШНО ВЫБРАНА!")
+                    self._record_company_result(success=True)
+                    if option_text:
+                        self._company_option_cache[company_name] = option_text
 
-                    # Ждём загрузки списка драйверов
-                    logger.info(f"{prefix} Ожидание загрузки драйверов...")
-                    await page.wait_for_timeout(2000)
-                    try:
-                        await page.wait_for_load_state('networkidle', timeout=10000)
-                    except Exception:
-                        pass
-
+                    # Ждём селектор драйверов (networkidle на SPA с фоновыми запросами часто висит до таймаута)
+                    logger.debug(f"{prefix} Ожидание загрузки драйверов...")
                     try:
                         await page.wait_for_selector('#select-driver', state='visible', timeout=15000)
-                        logger.info(f"{prefix} ✅ Селектор драйверов готов")
-                        await page.wait_for_timeout(1000)
+                        logger.debug(f"{prefix} ✅ Селектор драйверов готов")
                         await self._debug_screenshot(page, f"company_7_success_{driver_index}")
                         return  # УСПЕХ!
                     except Exception as e:
@@ -894,45 +1303,36 @@ class LogScannerService:
                     logger.warning(f"{prefix} ⚠️ Выбрано '{selected_text}', ожидали '{company_name}'")
                     await self._debug_screenshot(page, f"company_ERROR_wrong_{driver_index}_{attempt}")
                     await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
 
             except Exception as e:
                 logger.error(f"{prefix} ❌ Ошибка выбора компании (попытка {attempt + 1}): {e}")
                 await self._debug_screenshot(page, f"company_ERROR_exception_{driver_index}_{attempt}")
-                await page.wait_for_timeout(1000)
+                if self._is_unrecoverable(page, e):
+                    logger.error(f"{prefix} ❌ Ошибка неустранима повтором, прекращаем попытки")
+                    break
+                if attempt + 1 < max_attempts:
+                    await page.wait_for_timeout(_retry_delay_ms(attempt))
 
         await self._debug_screenshot(page, f"company_FINAL_FAILURE_{driver_index}")
+        self._record_company_result(success=False)
         raise Exception(f"Не удалось выбрать компанию '{company_name}' после {max_attempts} попыток")
 
     async def _select_driver_improved(self, page, driver_id: str, driver_name: str = None, driver_index: int = 0, total_drivers: int = 1):
         """
         Выбор драйвера в Ant Design Select с дебаг-скриншотами.
-        Используем КЛИК ПО КООРДИНАТАМ вместо Enter.
+        Используем КЛИК МЫШЬЮ по опции вместо Enter.
         """
         prefix = f"[{driver_index + 1}/{total_drivers}]"
         search_query = driver_name or driver_id[:8]
         logger.info(f"{prefix} 👤 === НАЧАЛО ВЫБОРА ДРАЙВЕРА: '{search_query}' ===")
 
-        # Ждём стабилизации страницы после выбора компании
-        try:
-            await page.wait_for_load_state('networkidle', timeout=10000)
-        except Exception:
-            pass
-
         # Проверяем что компания всё ещё выбрана
-        company_check = await page.evaluate('''
-            () => {
-                const input = document.querySelector('#select-company');
-                const parent = input?.closest('.ant-select');
-                const selection = parent?.querySelector('.ant-select-selection-item');
-                return selection?.textContent?.trim() || '';
-            }
-        ''')
+        company_check = await page.evaluate("__pthora.selection('#select-company').value")
         if not company_check:
             logger.error(f"{prefix} ❌ Компания не выбрана! Страница обновилась.")
             await self._debug_screenshot(page, f"driver_ERROR_no_company_{driver_index}")
             raise Exception("Company selection was lost - page may have refreshed")
-        logger.info(f"{prefix} ✅ Компания на месте: '{company_check}'")
+        logger.debug(f"{prefix} ✅ Компания на месте: '{company_check}'")
 
         await self._debug_screenshot(page, f"driver_1_start_{driver_index}")
 
@@ -943,117 +1343,60 @@ class LogScannerService:
 
                 # Ждём селектор драйвера
                 await self._wait_for_selector_with_retry(page, '#select-driver', max_attempts=5, wait_between=2000)
-                await page.wait_for_timeout(1000)
 
                 # Кликаем по РОДИТЕЛЬСКОМУ .ant-select-selector
-                clicked_selector = await page.evaluate('''
-                    () => {
-                        const input = document.querySelector('#select-driver');
-                        if (!input) return null;
-                        const antSelect = input.closest('.ant-select');
-                        if (antSelect) {
-                            const sel = antSelect.querySelector('.ant-select-selector');
-                            if (sel) {
-                                sel.setAttribute('data-pthora-click', 'driver');
-                                return '[data-pthora-click="driver"]';
-                            }
-                        }
-                        return null;
-                    }
-                ''')
+                clicked_selector = await page.evaluate("__pthora.markSelector('#select-driver', 'driver')")
 
                 if clicked_selector:
                     await page.click(clicked_selector)
                 else:
                     await page.click('#select-driver')
-                await page.wait_for_timeout(800)
+                await self._wait_for_dropdown(page)
 
-                # Очищаем и вводим имя
-                await page.keyboard.press('Control+A')
-                await page.wait_for_timeout(100)
-                await page.keyboard.press('Backspace')
-                await page.wait_for_timeout(100)
-
-                logger.info(f"{prefix} Вводим: '{search_query}'")
-                await page.keyboard.type(search_query, delay=80)
-                await page.wait_for_timeout(2500)
+                # Очищаем и вводим имя (на повторной попытке запрос может уже стоять в input)
+                if await page.input_value('#select-driver') == search_query:
+                    logger.debug(f"{prefix} Запрос '{search_query}' уже введён, переоткрыли dropdown")
+                else:
+                    logger.debug(f"{prefix} Вводим: '{search_query}'")
+                    await self._enter_search(page, '#select-driver', search_query, attempt)
+                filtered = await self._wait_for_filtered_options(page, search_query)
                 await self._debug_screenshot(page, f"driver_2_after_type_{driver_index}")
 
-                # Проверяем dropdown
-                try:
-                    await page.wait_for_selector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)', timeout=5000)
-                except Exception:
+                # Проверяем dropdown (уже открыт, если фильтрация дождалась опций)
+                if not filtered and not await self._wait_for_dropdown(page, timeout=5000):
                     logger.warning(f"{prefix} ⚠️ Dropdown не открылся")
                     await self._debug_screenshot(page, f"driver_ERROR_no_dropdown_{driver_index}")
                     await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
                     continue
 
                 # Ищем опции
-                options_info = await page.evaluate('''
-                    () => {
-                        const dd = document.querySelector('.ant-select-dropdown:not(.ant-select-dropdown-hidden)');
-                        if (!dd) return { count: 0 };
-                        const opts = dd.querySelectorAll('.ant-select-item-option');
-                        return {
-                            count: opts.length,
-                            texts: Array.from(opts).slice(0, 3).map(o => o.textContent?.trim())
-                        };
-                    }
-                ''')
-                logger.info(f"{prefix} Опции: {options_info}")
+                options_info = await page.evaluate("__pthora.dropdownOptions(3, false)")
+                logger.debug("{} Опции: {}", prefix, options_info)
 
                 if options_info.get('count', 0) == 0:
                     logger.warning(f"{prefix} ⚠️ Нет опций!")
                     await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
                     continue
 
-                # КЛИК ПО КООРДИНАТАМ
-                driver_option = await page.query_selector('.ant-select-dropdown:not(.ant-select-dropdown-hidden) .ant-select-item-option:first-child')
-                clicked = False
-                if driver_option:
-                    box = await driver_option.bounding_box()
-                    if box:
-                        await page.mouse.click(box['x'] + box['width'] / 2, box['y'] + box['height'] / 2)
-                        logger.info(f"{prefix} ✅ Клик по драйверу ({box['x']:.0f}, {box['y']:.0f})")
-                        clicked = True
-                    else:
-                        try:
-                            await driver_option.click(force=True)
-                            clicked = True
-                        except Exception:
-                            pass
+                # КЛИК МЫШЬЮ через Locator
+                driver_option = page.locator(f'{_OPEN_DROPDOWN} .ant-select-item-option').first
+                clicked = await self._click_option(driver_option, prefix)
 
                 if not clicked:
-                    # Fallback: ArrowDown + click
+                    # Fallback: ArrowDown + click по активной опции
                     await page.keyboard.press('ArrowDown')
-                    await page.wait_for_timeout(300)
-                    active = await page.query_selector('.ant-select-item-option-active')
-                    if active:
-                        box = await active.bounding_box()
-                        if box:
-                            await page.mouse.click(box['x'] + box['width'] / 2, box['y'] + box['height'] / 2)
-                            clicked = True
+                    clicked = await self._click_option(page.locator('.ant-select-item-option-active').first, prefix)
 
                 if not clicked:
                     logger.warning(f"{prefix} ⚠️ Клик не удался")
                     await self._debug_screenshot(page, f"driver_ERROR_click_{driver_index}")
                     await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
                     continue
 
-                await page.wait_for_timeout(2000)
+                await self._wait_for_selection(page, '#select-driver', '')
 
                 # Верификация
-                selected_value = await page.evaluate('''
-                    () => {
-                        const input = document.querySelector('#select-driver');
-                        const parent = input?.closest('.ant-select');
-                        const selection = parent?.querySelector('.ant-select-selection-item');
-                        return selection?.textContent?.trim() || '';
-                    }
-                ''')
+                selected_value = await page.evaluate("__pthora.selection('#select-driver').value")
 
                 if selected_value:
                     logger.info(f"{prefix} ✅ Драйвер выбран: '{selected_value}'")
@@ -1063,22 +1406,18 @@ class LogScannerService:
                     logger.warning(f"{prefix} ⚠️ Драйвер не выбран")
                     await self._debug_screenshot(page, f"driver_ERROR_empty_{driver_index}_{attempt}")
                     await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
 
             except Exception as e:
                 logger.error(f"{prefix} ❌ Ошибка: {e}")
                 await self._debug_screenshot(page, f"driver_ERROR_{driver_index}_{attempt}")
-                await page.wait_for_timeout(1000)
+                if self._is_unrecoverable(page, e):
+                    logger.error(f"{prefix} ❌ Ошибка неустранима повтором, прекращаем попытки")
+                    break
+                if attempt + 1 < max_attempts:
+                    await page.wait_for_timeout(_retry_delay_ms(attempt))
 
         raise Exception(f"Не удалось выбрать драйвера '{search_query}' после {max_attempts} попыток")
 
-    async def _select_company(self, page, company_name: str):
-        """
-        Выбирает компанию используя КЛАВИАТУРНУЮ навигацию Ant Design Select.
-        DEPRECATED: Используйте _select_company_improved
-        """
-        await self._select_company_improved(page, company_name)
-
     async def _select_first_company(self, page):
         """Выбирает первую доступную компанию."""
         logger.info("🏢 Выбор первой компании...")
@@ -1107,12 +1446,6 @@ class LogScannerService:
             logger.info("✅ Компания выбрана")
             await page.wait_for_timeout(1000)
 
-    async def _select_driver_by_id(self, page, driver_id: str, driver_name: str = None):
-        """
-        Выбирает драйвера. DEPRECATED: Используйте _select_driver_improved
-        """
-        await self._select_driver_improved(page, driver_id, driver_name)
-
     async def _click_create(self, page):
         """Нажимает кнопку CREATE и переключается на новую вкладку."""
         logger.info("🔘 Нажатие кнопки CREATE...")
@@ -1125,39 +1458,28 @@ class LogScannerService:
         new_page = await new_page_info.value
         logger.info(f"✅ Новая вкладка открыта: {new_page.url}")
 
-        # Ждем загрузки
-        await new_page.wait_for_load_state('networkidle', timeout=15000)
-        await new_page.wait_for_timeout(3000)
+        # Ждём, пока форма логов заполнит даты по умолчанию (их читает _set_date_range),
+        # вместо networkidle + фиксированной паузы
+        try:
+            await new_page.wait_for_function(
+                "() => !!document.querySelector('.ant-picker-input input')?.value",
+                timeout=15000
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Даты на новой вкладке не появились: {e}")
 
         return new_page
 
-    async def _select_dates(self, page, start_date_str: str, end_date_str: str):
-        """Устанавливает даты из строк (wrapper для _set_date_range)."""
-        logger.info(f"📅 Выбор дат: {start_date_str} - {end_date_str}...")
-
-        # Конвертируем строки в datetime
-        from datetime import datetime
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-
-        # Вызываем существующий метод
-        await self._set_date_range(page, start_date, end_date)
-
-    async def _set_date_range(self, page, start_date: datetime, end_date: datetime):
+    async def _set_date_range(self, page, dates: DateRange):
         """Устанавливает диапазон дат."""
-        logger.info(f"📅 Установка дат: {start_date.date()} - {end_date.date()}...")
+        logger.info(f"📅 Установка дат: {dates.start_str} - {dates.end_str}...")
 
-        # Импортируем helper для установки дат
-        try:
-            import sys
-            from pathlib import Path
-            helpers_path = Path(__file__).parent.parent.parent / "helpers"
-            if str(helpers_path) not in sys.path:
-                sys.path.insert(0, str(helpers_path))
-
-            from date_picker import set_date_range_simple
+        if set_date_range_simple is None:
+            logger.warning("⚠️ helpers/date_picker не загружен, используются даты по умолчанию")
+            return
 
-            date_set = await set_date_range_simple(page, start_date, end_date)
+        try:
+            date_set = await set_date_range_simple(page, dates.start, dates.end)
 
             if date_set:
                 logger.info("✅ Даты установлены")
@@ -1193,28 +1515,50 @@ class LogScannerService:
             logger.error("❌ Кнопка LOAD не найдена!")
             raise Exception("LOAD button not found")
 
-        # Используем координатный клик (самый надёжный для stubborn buttons)
-        box = await load_button.bounding_box()
-        if box:
-            x = box['x'] + box['width'] / 2
-            y = box['y'] + box['height'] / 2
-            await page.mouse.click(x, y)
-            logger.info("✅ Кнопка LOAD нажата (координатный клик)")
-        else:
-            await load_button.click(force=True)
-            logger.info("✅ Кнопка LOAD нажата (force)")
-
-        # КРИТИЧНО: Ждём достаточно времени для загрузки данных
-        logger.info("⏳ Ожидание загрузки логов (15 секунд)...")
-        await page.wait_for_timeout(15000)
+        # Нажимаем и сразу ловим ответ API с логами: как только он пришёл, таблица
+        # отрисовывается за доли секунды, и пустой результат не ждёт полный таймаут
+        logger.info("⏳ Ожидание загрузки логов...")
+        response_received = False
+        try:
+            async with page.expect_response(self._is_logs_response, timeout=30000) as response_info:
+                # Используем координатный клик (самый надёжный для stubborn buttons)
+                box = await load_button.bounding_box()
+                if box:
+                    x = box['x'] + box['width'] / 2
+                    y = box['y'] + box['height'] / 2
+                    await page.mouse.click(x, y)
+                    logger.info("✅ Кнопка LOAD нажата (координатный клик)")
+                else:
+                    await load_button.click(force=True)
+                    logger.info("✅ Кнопка LOAD нажата (force)")
+            response = await response_info.value
+            response_received = True
+            if response.ok:
+                logger.info(f"✅ Ответ с логами получен: {response.status} {response.url}")
+            else:
+                logger.warning(f"⚠️ Ответ с логами с ошибкой: {response.status} {response.url}")
+        except PlaywrightTimeout:
+            logger.warning("⚠️ Ответ с логами не пойман, ждём строки таблицы")
 
-        # Дополнительно ждём пока таблица появится
+        # Ждём первые строки логов; пустой tbody не подходит - в нём есть
+        # строка-заглушка ant-table-placeholder
         try:
-            await page.wait_for_selector('.patch-table-row, .ant-table-row, table tbody tr', timeout=10000)
+            await page.wait_for_selector(
+                '.patch-table-row, .ant-table-row',
+                timeout=10000 if response_received else 25000
+            )
             logger.info("✅ Таблица с логами загружена")
         except Exception:
             logger.warning("⚠️ Таблица может быть пустой или не загружена")
 
+    @staticmethod
+    def _is_logs_response(response) -> bool:
+        """Ответ XHR/fetch, похожий на выдачу логов (см. _LOGS_RESPONSE_RE)."""
+        request = response.request
+        if request.resource_type not in ('xhr', 'fetch') or request.method not in ('GET', 'POST'):
+            return False
+        return bool(_LOGS_RESPONSE_RE.search(urlsplit(response.url).path))
+
     async def _extract_logs(self, page) -> List[Dict[str, Any]]:
         """Извлекает логи из таблицы."""
         logger.info("📊 Извлечение логов...")
@@ -1223,55 +1567,7 @@ class LogScannerService:
         await self._scroll_to_bottom(page)
 
         # Извлекаем данные
-        result = await page.evaluate('''
-            () => {
-                let rows = document.querySelectorAll('.patch-table-row:not(.patch-table-header)');
-
-                if (rows.length === 0) {
-                    rows = document.querySelectorAll('.ant-table-row');
-                }
-
-                if (rows.length === 0) {
-                    rows = document.querySelectorAll('table tbody tr');
-                }
-
-                const logs = [];
-
-                rows.forEach((row, idx) => {
-                    let cells = row.querySelectorAll('td');
-                    if (cells.length === 0) {
-                        cells = Array.from(row.children);
-                    }
-
-                    if (cells.length >= 5) {
-                        const timeText = cells[0]?.textContent?.trim() || '';
-                        const eventText = cells[1]?.textContent?.trim() || '';
-
-                        // Фильтруем строки календаря
-                        const isCalendarRow = /^\\d{1,2}$/.test(timeText) && /^\\d{1,2}$/.test(eventText);
-                        if (isCalendarRow || (!timeText && !eventText)) {
-                            return;
-                        }
-
-                        const logEntry = {
-                            time: timeText,
-                            event: eventText,
-                            duration: cells[2]?.textContent?.trim() || '',
-                            status: cells[3]?.textContent?.trim() || '',
-                            location: cells[4]?.textContent?.trim() || '',
-                        };
-
-                        if (cells.length >= 6) logEntry.odometer = cells[5]?.textContent?.trim() || '';
-                        if (cells.length >= 7) logEntry.eh = cells[6]?.textContent?.trim() || '';
-                        if (cells.length >= 8) logEntry.notes = cells[7]?.textContent?.trim() || '';
-
-                        logs.push(logEntry);
-                    }
-                });
-
-                return logs;
-            }
-        ''')
+        result = await page.evaluate(_EXTRACT_LOGS_JS)
 
         logger.info(f"✅ Извлечено {len(result)} записей")
         return result
@@ -1280,53 +1576,60 @@ class LogScannerService:
         """Скроллит таблицу до конца."""
         logger.info("📜 Скроллинг таблицы...")
 
-        prev_rows = 0
-        no_change = 0
-
-        for i in range(100):
-            await page.evaluate('window.scrollBy(0, window.innerHeight)')
-            await page.wait_for_timeout(200)
-
-            new_rows = await page.evaluate("document.querySelectorAll('table tbody tr, .ant-table-row').length")
+        # Весь цикл прокрутки выполняется в странице за один evaluate,
+        # а не два CDP-вызова на каждую итерацию
+        rows = await page.evaluate('''
+            async () => {
+                let prevRows = 0;
+                let noChange = 0;
+
+                for (let i = 0; i < 100; i++) {
+                    window.scrollBy(0, window.innerHeight);
+                    await new Promise(resolve => setTimeout(resolve, 200));
+
+                    const newRows = document.querySelectorAll('table tbody tr, .ant-table-row').length;
+                    if (newRows !== prevRows) {
+                        noChange = 0;
+                        prevRows = newRows;
+                    } else if (++noChange >= 5) {
+                        break;
+                    }
+                }
 
-            if new_rows != prev_rows:
-                no_change = 0
-                prev_rows = new_rows
-            else:
-                no_change += 1
-                if no_change >= 5:
-                    break
+                return prevRows;
+            }
+        ''')
 
-        logger.info(f"✅ Скроллинг завершён")
+        logger.info(f"✅ Скроллинг завершён ({rows} строк)")
 
     def _analyze_logs(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Анализирует логи на проблемы."""
         issues = []
+        status_error = _STATUS_ERROR_RE.search
+        notes_error = _NOTES_ERROR_RE.search
 
         for idx, log in enumerate(logs):
             # Проверяем status на ошибки
-            if log.get('status'):
-                status_lower = log['status'].lower()
-                if any(keyword in status_lower for keyword in ['error', 'missing', 'violation', 'invalid']):
-                    issues.append({
-                        'index': idx,
-                        'time': log.get('time'),
-                        'event': log.get('event'),
-                        'status': log.get('status'),
-                        'issue_type': 'status_error'
-                    })
+            status = log.get('status')
+            if status and status_error(status):
+                issues.append({
+                    'index': idx,
+                    'time': log.get('time'),
+                    'event': log.get('event'),
+                    'status': status,
+                    'issue_type': 'status_error'
+                })
 
             # Проверяем notes на ошибки
-            if log.get('notes'):
-                notes_lower = log['notes'].lower()
-                if any(keyword in notes_lower for keyword in ['error', 'fail', 'violation', 'missing']):
-                    issues.append({
-                        'index': idx,
-                        'time': log.get('time'),
-                        'event': log.get('event'),
-                        'notes': log.get('notes'),
-                        'issue_type': 'notes_error'
-                    })
+            notes = log.get('notes')
+            if notes and notes_error(notes):
+                issues.append({
+                    'index': idx,
+                    'time': log.get('time'),
+                    'event': log.get('event'),
+                    'notes': notes,
+                    'issue_type': 'notes_error'
+                })
 
         return issues
 
@@ -1348,8 +1651,7 @@ class LogScannerService:
             }
         }
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        _write_json_atomic(file_path, data)
 
         logger.info(f"💾 Логи сохранены: {file_path}")
 
@@ -1361,8 +1663,7 @@ class LogScannerService:
             'issues': issues
         }
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        _write_json_atomic(file_path, data)
 
         logger.info(f"💾 Проблемы сохранены: {file_path}")
 
@@ -1375,8 +1676,8 @@ class LogScannerService:
         company_name: str
     ):
         """Анализирует логи и сохраняет найденные проблемы в базу данных."""
-        # Анализируем логи на предмет проблем
-        issues = self._analyze_logs(logs)
+        # Анализируем логи на предмет проблем (в потоке, чтобы не тормозить другие вкладки)
+        issues = await asyncio.to_thread(self._analyze_logs, logs)
 
         # Сохраняем найденные проблемы
         if issues:
@@ -1406,54 +1707,54 @@ class LogScannerService:
 
         try:
             async with get_db_session() as session:
-                errors_created = 0
-
-                for idx, issue in enumerate(issues):
-                    try:
-                        # Определяем тип ошибки
-                        error_key = issue.get('issue_type', 'LOG_SCAN_ERROR')
-
-                        # Формируем сообщение об ошибке
-                        if issue.get('issue_type') == 'status_error':
-                            error_message = f"Status: {issue.get('status', 'Unknown')}"
-                            error_name = "Log Status Error"
-                            severity = 'high'
-                        elif issue.get('issue_type') == 'notes_error':
-                            error_message = f"Notes: {issue.get('notes', 'Unknown')}"
-                            error_name = "Log Notes Error"
-                            severity = 'medium'
-                        else:
-                            error_message = str(issue)
-                            error_name = "Log Scan Error"
-                            severity = 'low'
-
-                        # Создаём запись об ошибке
-                        db_error = Error(
-                            driver_id=driver_id,
-                            driver_name=driver_name,
-                            company_id=company_id or "unknown",
-                            company_name=company_name or "Unknown",
-                            error_key=error_key,
-                            error_name=error_name,
-                            error_message=error_message,
-                            severity=severity,
-                            status='pending',
-                            error_metadata=issue  # Сохраняем полные данные issue
-                        )
-                        session.add(db_error)
-                        errors_created += 1
-
-                    except Exception as e:
-                        logger.warning(f"⚠️ Не удалось сохранить проблему {idx + 1}: {e}")
+                rows = []
+
+                for issue in issues:
+                    # Определяем тип ошибки
+                    error_key = issue.get('issue_type', 'LOG_SCAN_ERROR')
+
+                    # Формируем сообщение об ошибке
+                    if issue.get('issue_type') == 'status_error':
+                        error_message = f"Status: {issue.get('status', 'Unknown')}"
+                        error_name = "Log Status Error"
+                        severity = 'high'
+                    elif issue.get('issue_type') == 'notes_error':
+                        error_message = f"Notes: {issue.get('notes', 'Unknown')}"
+                        error_name = "Log Notes Error"
+                        severity = 'medium'
+                    else:
+                        error_message = str(issue)
+                        error_name = "Log Scan Error"
+                        severity = 'low'
+
+                    # Готовим строку для пакетной вставки
+                    rows.append({
+                        'driver_id': driver_id,
+                        'driver_name': driver_name,
+                        'company_id': company_id or "unknown",
+                        'company_name': company_name or "Unknown",
+                        'error_key': error_key,
+                        'error_name': error_name,
+                        'error_message': error_message,
+                        'severity': severity,
+                        'status': 'pending',
+                        'error_metadata': issue  # Сохраняем полные данные issue
+                    })
 
+                # Один bulk INSERT вместо flush каждого ORM-объекта
+                await session.execute(insert(Error), rows)
                 await session.commit()
-                logger.info(f"💾 Успешно сохранено {errors_created}/{len(issues)} ошибок в БД для драйвера {driver_name} ({driver_id[:8]})")
+                logger.info(f"💾 Успешно сохранено {len(rows)} ошибок в БД для драйвера {driver_name} ({driver_id[:8]})")
 
         except Exception as e:
             logger.exception(f"❌ Ошибка при сохранении проблем в БД: {e}")
 
     async def cleanup(self):
-        """Закрывает браузер."""
+        """Закрывает браузер и Fortex API клиент."""
+        await self._close_idle_contexts()
+        if self._fortex_client:
+            await self._fortex_client.close()
+            self._fortex_client = None
         if self.browser_manager:
             await self.browser_manager.cleanup()
             self.browser_manager = None
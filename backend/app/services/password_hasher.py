@@ -0,0 +1,57 @@
+"""Password hashing backend for user credentials.
+
+Hashes are stored in the standard bcrypt ``$2b$`` modular format, so every
+row in ``users.password_hash`` stays verifiable regardless of which bcrypt
+build is installed. ``bcrypt>=4`` ships the PyO3/Rust implementation of
+EksBlowfish; older C builds still work but are noticeably slower.
+
+A bcrypt hash/check takes tens of milliseconds, so both run in a worker
+thread (bcrypt releases the GIL) instead of blocking the event loop.
+"""
+
+import asyncio
+import base64
+import os
+
+import bcrypt
+from loguru import logger
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# bcrypt salts are "$2b$<cost>$" + 16 random bytes in bcrypt's own base64
+# alphabet. The prefix is fixed, so only the random part is built per hash.
+_SALT_PREFIX = f"$2b${settings.bcrypt_rounds:02d}$".encode("ascii")
+_TO_BCRYPT_ALPHABET = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789",
+)
+
+
+def _gensalt() -> bytes:
+    return _SALT_PREFIX + base64.b64encode(os.urandom(16))[:22].translate(_TO_BCRYPT_ALPHABET)
+
+
+def _hash_sync(password: str) -> str:
+    salt = _gensalt()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    return hashed.decode('utf-8')
+
+
+def _verify_sync(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    except Exception as e:
+        logger.error(f"Password verification error: {e}")
+        return False
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password using bcrypt."""
+    return await asyncio.to_thread(_hash_sync, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plain password against its hash."""
+    return await asyncio.to_thread(_verify_sync, plain_password, hashed_password)
@@ -41,6 +41,18 @@ class ProgressTracker:
         progress['step'] = 'starting'
         progress['step_message'] = 'Инициализация браузера для драйвера...'
 
+    def complete_driver(self, scan_id: str, driver_id: str):
+        """Mark one driver of a parallel scan as finished (any order)."""
+        if scan_id not in self._progress:
+            return
+
+        progress = self._progress[scan_id]
+        progress['completed_drivers'] += 1
+        progress['current_driver_id'] = driver_id
+        total = progress['total_drivers']
+        progress['progress_percent'] = int((progress['completed_drivers'] / total) * 100) if total > 0 else 0
+        progress['message'] = f'Просканировано водителей: {progress["completed_drivers"]} из {total}'
+
     def update_message(self, scan_id: str, message: str):
         """Update progress message (high-level)."""
         if scan_id not in self._progress:
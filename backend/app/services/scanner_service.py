@@ -7,6 +7,8 @@ from loguru import logger
 from typing import List, Dict, Any
 import uuid
 
+from sqlalchemy import insert
+
 from app.playwright.browser_manager import BrowserManager
 from app.fortex.client import FortexAPIClient
 from app.config import get_settings
@@ -149,7 +151,7 @@ class ScannerService:
             if company_data and hasattr(company_data, 'drivers'):
                 # Find this driver's data
                 for driver_log in company_data.drivers:
-                    if (driver_log.driver_id == driver_id or driver_log.driverId == driver_id):
+                    if driver_log.driver_id == driver_id:
                         # Get driver name from API or use fallback
                         if hasattr(driver_log, 'driver_name') and driver_log.driver_name:
                             driver_name = driver_log.driver_name
@@ -162,7 +164,7 @@ class ScannerService:
                             for error in driver_log.logCheckErrors:
                                 # Get error type and message
                                 error_type = getattr(error, 'errorType', None) or getattr(error, 'type', None) or 'unknown'
-                                error_message = getattr(error, 'errorMessage', None) or getattr(error, 'message', None) or 'Unknown Error'
+                                error_message = error.errorMessage or 'Unknown Error'
 
                                 errors.append({
                                     'type': error_type,
@@ -213,7 +215,7 @@ class ScannerService:
         """Save errors to database with proper classification."""
         try:
             async with get_db_session() as session:
-                saved_count = 0
+                rows = []
                 skipped_count = 0
 
                 for error in errors:
@@ -226,8 +228,8 @@ class ScannerService:
                         # Use classified values
                         error_key = classification.key
                         error_name = classification.name
-                        severity = classification.severity.value
-                        category = classification.category.value
+                        severity = classification.severity.label
+                        category = classification.category.label
                     else:
                         # Fallback for unclassified errors
                         error_key = error.get('type', 'unknown')
@@ -236,24 +238,25 @@ class ScannerService:
                         category = error.get('category', 'uncategorized')
                         logger.debug(f"Unclassified error: '{error_message[:50]}...'")
 
-                    db_error = Error(
-                        driver_id=driver_id,
-                        driver_name=driver_name,
-                        company_id=company_id,
-                        company_name=company_name,
-                        error_key=error_key,
-                        error_name=error_name,
-                        error_message=error_message,
-                        severity=severity,
-                        category=category,
-                        status='pending',
-                        error_metadata=error
-                    )
-                    session.add(db_error)
-                    saved_count += 1
-
+                    rows.append({
+                        'driver_id': driver_id,
+                        'driver_name': driver_name,
+                        'company_id': company_id,
+                        'company_name': company_name,
+                        'error_key': error_key,
+                        'error_name': error_name,
+                        'error_message': error_message,
+                        'severity': severity,
+                        'category': category,
+                        'status': 'pending',
+                        'error_metadata': error
+                    })
+
+                # One bulk INSERT instead of flushing one ORM object per row
+                if rows:
+                    await session.execute(insert(Error), rows)
                 await session.commit()
-                logger.info(f"Saved {saved_count} errors to database: driver={driver_id[:8]}, company={company_id}, driver_name={driver_name}, company_name={company_name}")
+                logger.info(f"Saved {len(rows)} errors to database: driver={driver_id[:8]}, company={company_id}, driver_name={driver_name}, company_name={company_name}")
                 if skipped_count > 0:
                     logger.warning(f"Skipped {skipped_count} unclassified errors")
 
@@ -311,12 +311,12 @@ class TelegramBotService:
 
                 driver_errors_map = {}
                 for driver_log in smart_data.drivers:
-                    did = driver_log.driver_id or driver_log.driverId
+                    did = driver_log.driver_id
                     if did in driver_ids:
                         errors_list = []
                         for err in driver_log.logCheckErrors:
                             errors_list.append({
-                                "errorMessage": err.errorMessage or err.message or "Unknown",
+                                "errorMessage": err.errorMessage or "Unknown",
                                 "errorTime": err.errorTime or err.timestamp,
                                 "errorType": err.errorType or err.type,
                                 "eventCode": err.eventCode,
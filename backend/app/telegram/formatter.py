@@ -8,7 +8,7 @@ Hidden errors counted but not listed.
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
-from app.services.error_classifier import error_classifier, HIDDEN_FROM_DISPLAY
+from app.services.error_classifier import ErrorClassification, error_classifier, HIDDEN_FROM_DISPLAY
 
 
 SEVERITY_EMOJI = {
@@ -37,11 +37,10 @@ def _fmt_time(error_time: Any) -> str:
     return ""
 
 
-def _classify(msg: str) -> Dict[str, str]:
-    """Classify error message."""
-    c = error_classifier.classify(msg)
+def _classify(msg: str, c: Optional[ErrorClassification]) -> Dict[str, str]:
+    """Convert a classification (or its absence) into display fields."""
     if c:
-        return {"key": c.key, "name": c.name, "severity": c.severity.value}
+        return {"key": c.key, "name": c.name, "severity": c.severity.label}
     return {"key": "unknown", "name": msg[:50], "severity": "medium"}
 
 
@@ -54,18 +53,19 @@ def format_driver_results(
         return f"\u2705 {driver_name} \u2014 Clean"
 
     # Classify + extract details
+    msgs = [
+        err.get("errorMessage")
+        or err.get("error_message")
+        or err.get("message")
+        or err.get("name")
+        or "Unknown"
+        for err in errors
+    ]
+    classifications = error_classifier.classify_batch(msgs)
     items = []
-    for err in errors:
-        msg = (
-            err.get("errorMessage")
-            or err.get("error_message")
-            or err.get("message")
-            or err.get("name")
-            or "Unknown"
-        )
-        cl = _classify(msg)
+    for err, msg, c in zip(errors, msgs, classifications):
         items.append({
-            **cl,
+            **_classify(msg, c),
             "time": _fmt_time(err.get("errorTime") or err.get("error_time") or err.get("timestamp")),
             "status": err.get("eventCode") or err.get("status") or "",
         })
@@ -14,6 +14,8 @@ if platform.system() == 'Windows':
 
 import uvicorn
 
+from app.event_loop import install_uvloop
+
 async def main():
     """Run uvicorn server with controlled event loop."""
     config = uvicorn.Config(
@@ -42,5 +44,6 @@ if __name__ == "__main__":
         finally:
             loop.close()
     else:
-        # On Linux/Mac, just use asyncio.run()
+        # On Linux/Mac, just use asyncio.run() (on uvloop when installed)
+        install_uvloop()
         asyncio.run(main())